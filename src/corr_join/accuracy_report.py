@@ -0,0 +1,64 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pandas as pd
+# Local imports
+from corr_join import corr_join
+from load_data import load_data
+from result_sink import ArraySink
+import util
+
+
+def dtype_accuracy_report(t_series, n: int, h: int, T: float, k_s: int,
+  k_e: int, k_b: int, dtype = np.float32, exact_verification: bool = True,
+  **options):
+  """
+  Run corr_join in float64 and in dtype and list the window pairs whose
+  classification differs between the two modes.
+
+  Parameters:
+  t_series (pandas.DataFrame or np.ndarray): The time series, one per row.
+  n, h, T, k_s, k_e, k_b: See util.get_params.
+  dtype: The floating point type to compare with float64.
+  exact_verification (bool): See corr_join.corr_join.
+  options: Further keyword arguments for corr_join, e.g. alpha_stop.
+
+  Returns:
+  pandas.DataFrame: One row per differing pair with the window alpha, the
+  time series i and j, the mode that found the pair and the correlation of
+  the pair computed in float64.
+  """
+  found = {}
+  for mode in (np.float64, dtype):
+    sink = ArraySink()
+    corr_join(t_series, n, h, T, k_s, k_e, k_b, dtype=mode,
+      exact_verification=exact_verification, sink=sink, **options)
+    columns = sink.columns()
+    pairs = found[np.dtype(mode).name] = {}
+    for alpha, i, j in zip(columns["alpha"].tolist(), columns["i"].tolist(),
+      columns["j"].tolist()):
+      pairs.setdefault(alpha, set()).add((i, j))
+
+  ts_windows = util.sliding_windows(util.as_time_series_matrix(t_series), n, h)
+  rows = []
+  for alpha in sorted(found["float64"].keys() | found[np.dtype(dtype).name].keys()):
+    pairs_64 = found["float64"].get(alpha, set())
+    pairs_other = found[np.dtype(dtype).name].get(alpha, set())
+    differing = sorted(pairs_64 ^ pairs_other)
+    if not differing:
+      continue
+    distances = util.pair_distances(ts_windows[:, alpha], np.array(differing))
+    for (i, j), d in zip(differing, distances):
+      found_by = "float64" if (i, j) in pairs_64 else np.dtype(dtype).name
+      rows.append((alpha, i, j, found_by, 1 - d**2/2))
+  return pd.DataFrame(rows, columns=["alpha", "i", "j", "found_by", "corr"])
+
+
+if __name__ == '__main__':
+  for dataset in ("chlorine", "gas", "synthetic"):
+    n, h, T, k_s, k_e, k_b = util.get_params("m_params")
+    for exact_verification in (False, True):
+      report = dtype_accuracy_report(load_data(dataset, 1000), n, h, T, k_s, k_e,
+        k_b, exact_verification=exact_verification, alpha_stop=100)
+      print(f"log info: {dataset}, exact_verification = {exact_verification}: {len(report)} differing pairs")
+      print(report.to_string(index=False))
@@ -0,0 +1,250 @@
+# Standard library imports
+import argparse
+from itertools import product
+import json
+from math import sqrt
+import os
+import platform
+import sys
+from time import perf_counter_ns
+# Third-party imports
+import numpy as np
+# Local imports
+from bucketing_filter import bucketing_filter
+from corr_join import WindowPrefix, normalize_windows
+from paa import paa_pyts, paa_reshape
+from svd import custom_svd
+from verification import euclidean_filter, verify_pairs
+
+
+def synthetic_windows(m: int, n: int, clusters: int = 8, seed: int = 0):
+  """
+  Generate one window of m random walks of length n. Each walk follows one of
+  a few latent random walks, so that the filters find candidate pairs.
+  """
+  rng = np.random.default_rng(seed)
+  latent = np.cumsum(rng.normal(size=(clusters, n)), axis=1)
+  noise = np.cumsum(rng.normal(size=(m, n)), axis=1)
+  return latent[rng.integers(0, clusters, m)] + 0.5*noise + 50
+
+
+def pipeline_inputs(params):
+  """
+  Run the stages of corr_join up to the Euclidean distance filter on one
+  synthetic window, with the functions of corr_join, so that each kernel
+  gets realistic inputs.
+
+  Returns:
+  dict: w, W, W_s, W_e, W_b, C_1 and C_2 of the window.
+  """
+  m, n, T = params["m"], params["n"], params.get("T", 0.85)
+  k_s, k_e, k_b = params.get("k_s", 15), params.get("k_e", 30), params.get("k_b", 3)
+  w = synthetic_windows(m, n)
+  prefix = WindowPrefix(n, n, k_s, k_e, k_b)
+  W_s, W_e, W_b = prefix.transform(w)
+  C_1, _ = bucketing_filter(W_b, k_b, sqrt(2*k_s*(1-T)/n))
+  C_2 = C_1[euclidean_filter(W_e, C_1, sqrt(2*k_e*(1-T)/n))]
+  return {"w": w, "W": prefix.W, "W_s": W_s, "W_e": W_e, "W_b": W_b, "C_1": C_1,
+    "C_2": C_2}
+
+
+def setup_custom_svd(p):
+  return pipeline_inputs(p)["W_s"], p["k_b"]
+
+
+def setup_bucketing_filter(p):
+  return pipeline_inputs(p)["W_b"], p["k_b"], sqrt(2*p["k_s"]*(1-p["T"])/p["n"])
+
+
+def setup_euclidean_filter(p):
+  inputs = pipeline_inputs(p)
+  return inputs["W_e"], inputs["C_1"], sqrt(2*p["k_e"]*(1-p["T"])/p["n"])
+
+
+def setup_verification(p):
+  inputs = pipeline_inputs(p)
+  return inputs["W"], inputs["C_2"], p["T"]
+
+
+# Each kernel has a setup, which computes the arguments of the kernel from the
+# grid parameters and isn't timed, the kernel itself, the number of operations
+# of one call, the unit of these operations, and the default parameter grid.
+# ops/sec is the number of operations divided by the median time.
+kernels = {
+  "normalization": {
+    "setup": lambda p: (synthetic_windows(p["m"], p["n"]), ),
+    "kernel": normalize_windows,
+    "ops": lambda p, args: p["m"]*p["n"],
+    "unit": "samples",
+    "grid": {"m": [500, 2000], "n": [300, 1200]},
+  },
+  "paa_pyts": {
+    "setup": lambda p: (normalize_windows(synthetic_windows(p["m"], p["n"])), p["n"], p["k"]),
+    "kernel": paa_pyts,
+    "ops": lambda p, args: p["m"]*p["n"],
+    "unit": "samples",
+    "grid": {"m": [500, 2000], "n": [300, 1200], "k": [15, 30]},
+  },
+  "paa_reshape": {
+    "setup": lambda p: (normalize_windows(synthetic_windows(p["m"], p["n"])), p["n"], p["k"]),
+    "kernel": paa_reshape,
+    "ops": lambda p, args: p["m"]*p["n"],
+    "unit": "samples",
+    "grid": {"m": [500, 2000], "n": [300, 1200], "k": [15, 30]},
+  },
+  "custom_svd": {
+    "setup": setup_custom_svd,
+    "kernel": custom_svd,
+    "ops": lambda p, args: p["m"]*p["k_s"],
+    "unit": "entries of W_s",
+    "grid": {"m": [500, 2000], "n": [300], "k_s": [15, 30], "k_b": [3]},
+  },
+  "bucketing_filter": {
+    "setup": setup_bucketing_filter,
+    "kernel": bucketing_filter,
+    "ops": lambda p, args: p["m"],
+    "unit": "windows",
+    "grid": {"m": [500, 2000], "n": [300], "k_s": [15], "k_b": [3],
+      "T": [0.75, 0.85, 0.95]},
+  },
+  "euclidean_filter": {
+    "setup": setup_euclidean_filter,
+    "kernel": euclidean_filter,
+    "ops": lambda p, args: len(args[1]),
+    "unit": "pairs of C_1",
+    "grid": {"m": [500, 2000], "n": [300], "k_e": [30, 60], "T": [0.75, 0.85, 0.95]},
+  },
+  "verification": {
+    "setup": setup_verification,
+    "kernel": verify_pairs,
+    "ops": lambda p, args: len(args[1]),
+    "unit": "pairs of C_2",
+    "grid": {"m": [500, 1000], "n": [300, 1200], "T": [0.75, 0.85, 0.95]},
+  },
+}
+
+
+def grid_params(grid):
+  """
+  Returns:
+  list of dicts: One dict of parameters per combination of the grid values.
+  """
+  names = list(grid)
+  return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def time_kernel(kernel, args, repeats: int, warmup: int = 1):
+  """
+  Time repeated calls of a kernel.
+
+  Returns:
+  np.ndarray: The time of each call in seconds.
+  """
+  for _ in range(warmup):
+    kernel(*args)
+  times = np.empty(repeats)
+  for r in range(repeats):
+    time_start = perf_counter_ns()
+    kernel(*args)
+    times[r] = (perf_counter_ns()-time_start)/1e9
+  return times
+
+
+def run_benchmarks(names = None, grids = None, repeats: int = 7, warmup: int = 1):
+  """
+  Benchmark each kernel on each combination of its parameter grid.
+
+  Parameters:
+  names (list of str): The kernels to benchmark, defaults to all kernels.
+  grids (dict): Parameter grids that replace the default grid of a kernel,
+  e.g. {"normalization": {"m": [100], "n": [300]}}.
+  repeats (int): The number of timed calls per parameter combination.
+  warmup (int): The number of untimed calls before the timed calls.
+
+  Returns:
+  dict: "machine" describes the environment, "results" holds one entry per
+  kernel and parameter combination with the median, variance and minimum of
+  the times in seconds and the ops/sec at the median.
+  """
+  names = list(kernels) if names is None else names
+  grids = {} if grids is None else grids
+  results = []
+  for name in names:
+    if name not in kernels:
+      raise ValueError(f"Unknown kernel {name}, choose one of {list(kernels)}")
+    spec = kernels[name]
+    for params in grid_params(grids.get(name, spec["grid"])):
+      args = spec["setup"](params)
+      times = time_kernel(spec["kernel"], args, repeats, warmup)
+      ops = spec["ops"](params, args)
+      median = float(np.median(times))
+      results.append({
+        "kernel": name,
+        "params": params,
+        "repeats": repeats,
+        "median": median,
+        "variance": float(np.var(times)),
+        "min": float(np.min(times)),
+        "ops": int(ops),
+        "unit": spec["unit"],
+        "ops_per_sec": ops/median if median > 0 else float('inf'),
+      })
+      print(f"log info: {name} {params}: {round(median*1e3, 3)} ms")
+  machine = {"python": platform.python_version(), "numpy": np.__version__,
+    "platform": platform.platform(), "processor": platform.processor(),
+    "cpu_count": os.cpu_count()}
+  return {"machine": machine, "results": results}
+
+
+def result_key(result):
+  return result["kernel"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare_to_baseline(report, baseline, tolerance: float = 0.1):
+  """
+  Compare the medians of a report to a baseline report of run_benchmarks.
+  A result regresses if its median is more than tolerance slower than the
+  median of the baseline with the same kernel and parameters. Results
+  without a baseline are skipped.
+
+  Returns:
+  list of dicts: One entry per compared result with the kernel, the
+  parameters, both medians, the ratio new/baseline and whether it regressed.
+  """
+  baseline_results = {result_key(result): result for result in baseline["results"]}
+  comparison = []
+  for result in report["results"]:
+    base = baseline_results.get(result_key(result))
+    if base is None:
+      continue
+    ratio = result["median"]/base["median"] if base["median"] > 0 else float('inf')
+    comparison.append({"kernel": result["kernel"], "params": result["params"],
+      "median": result["median"], "baseline_median": base["median"],
+      "ratio": ratio, "regression": ratio > 1 + tolerance})
+  return comparison
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Benchmark the kernels of CorrJoin.")
+  parser.add_argument("--kernels", nargs="+", choices=list(kernels),
+    help="The kernels to benchmark, defaults to all kernels.")
+  parser.add_argument("--repeats", type=int, default=7)
+  parser.add_argument("--output", default="src/corr_join/logs/benchmark.json")
+  parser.add_argument("--baseline", help="A report of an earlier run to compare to.")
+  parser.add_argument("--tolerance", type=float, default=0.1,
+    help="The relative slowdown of the median that counts as a regression.")
+  arguments = parser.parse_args()
+
+  report = run_benchmarks(arguments.kernels, repeats=arguments.repeats)
+  if arguments.baseline is not None:
+    with open(arguments.baseline, encoding='utf-8') as baseline_file:
+      report["comparison"] = compare_to_baseline(report, json.load(baseline_file),
+        arguments.tolerance)
+  with open(arguments.output, 'w', encoding='utf-8') as output_file:
+    json.dump(report, output_file, indent=2)
+  print(f"log info: wrote {arguments.output}")
+
+  regressions = [entry for entry in report.get("comparison", []) if entry["regression"]]
+  for entry in regressions:
+    print(f"log info: regression {entry['kernel']} {entry['params']}: {round(entry['ratio'], 3)}x the baseline median")
+  sys.exit(1 if regressions else 0)
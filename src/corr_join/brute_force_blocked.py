@@ -0,0 +1,73 @@
+# Standard library imports
+import logging
+from time import perf_counter_ns
+# Third-party imports
+import numpy as np
+# Local imports
+import util
+
+
+def brute_force_blocked(t_series, n: int, h: int, T: float,
+  k_s: int = -1, k_e: int = -1, k_b: int = -1, alpha_start: int = 0,
+  alpha_stop = None, block_size: int = 2048):
+  """
+  brute_force_blocked computes the correlated window pairs exactly like
+  brute_force_p_corr, but with matrix multiplications instead of one
+  correlation per pair. The Pearson correlation of two windows is the dot
+  product of their normalized windows, so the correlation matrix of a window
+  is W*W^T. It is computed in tiles of block_size x block_size and each tile is
+  compared to T, so the memory is bounded by one tile regardless of m.
+  alpha_start and alpha_stop select the windows to process, see
+  util.window_range.
+  """
+  print('log info: running brute_force_blocked')
+  logger_1 = util.create_logger("brute_force_blocked_logger", logging.INFO,
+    "report-brute_force_blocked.log")
+  # Convert once, every window is a view of this matrix instead of a copy
+  t_series = util.as_time_series_matrix(t_series)
+  m = t_series.shape[0]   # number of time series
+  num_corr_pairs = 0  # Output
+  overall_pruning_rate = 0
+  logger_1.info(f"Threshold Theta: {T}")
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  ts_windows = util.sliding_windows(t_series, n, h)
+  # Times for profiling, 6 columns/measurements per processed window
+  p_times = np.empty((len(windows), 6))
+
+  for row, alpha in enumerate(windows):  # I assume all time series have the same length
+    # Time before shifting the window (0) for window alpha
+    p_times[row, 0] = perf_counter_ns()
+
+    # Shift windows
+    w = ts_windows[:, alpha]   # View of shape (m, n)
+    x_bar = np.mean(w, axis=1)  # np.ndarray of row means, shape (m,)
+    # Normalization
+    w_centered = w - x_bar[:, np.newaxis]
+    denominator = np.sqrt(np.sum(np.power(w_centered, 2), axis=1))  # np.ndarray of shape (m,)
+    W = np.divide(w_centered, denominator[:, np.newaxis]) # np.ndarray of shape (m, n)
+
+    # SVD, bucketing filter and Euclidean distance filter are skipped
+    p_times[row, 1] = perf_counter_ns()   # Time before SVD
+    p_times[row, 2] = p_times[row, 1]   # Time before bucketing filter
+    p_times[row, 3] = p_times[row, 1]   # Time before Euclidean distance filter
+
+    # Pearson correlation of all pairs, tile by tile of the upper triangle
+    p_times[row, 4] = p_times[row, 1]   # Time before computing the Pearson correlation
+    for lo_i in range(0, m, block_size):
+      W_i = W[lo_i:lo_i + block_size]
+      for lo_j in range(lo_i, m, block_size):
+        corrcoefs = W_i @ W[lo_j:lo_j + block_size].T
+        if lo_j == lo_i:
+          # Only the pairs (i, j) with i < j of a diagonal tile
+          num_corr_pairs += int(np.count_nonzero(np.triu(corrcoefs >= T, k=1)))
+        else:
+          num_corr_pairs += int(np.count_nonzero(corrcoefs >= T))
+    p_times[row, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
+
+  # Only the rows of the processed windows are filled
+  section_times = util.mean_section_times(p_times)
+
+  logger_1.info(
+    f"Report: In total the data contains {num_corr_pairs} correlated window pairs."
+  )
+  return num_corr_pairs, overall_pruning_rate, section_times
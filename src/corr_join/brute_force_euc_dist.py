@@ -1,8 +1,7 @@
 # Standard library imports
-from math import floor, sqrt
+from math import sqrt
 import logging
 from time import perf_counter_ns
-from typing import List
 # Third-party imports
 import numpy as np
 # Local imports
@@ -10,40 +9,41 @@ from inc_p import incp
 import util
 
 
-def brute_force_euc_dist(t_series: List[np.ndarray], n: int, h: int, T: float,
-  k_s: int = -1, k_e: int = -1, k_b: int = -1):
+def brute_force_euc_dist(t_series, n: int, h: int, T: float,
+  k_s: int = -1, k_e: int = -1, k_b: int = -1, alpha_start: int = 0,
+  alpha_stop = None):
   """
   brute_force_euc_dist computes the correlated window pairs directly using
   just the Euclidean distance and skips PAA, SVD, the bucketing filter, and
-  computing the Pearson correlation.
+  computing the Pearson correlation. alpha_start and alpha_stop select the
+  windows to process, see util.window_range.
   """
   print('log info: running brute_force_euc_dist')
   logger_1 = util.create_logger("brute_force_euc_dist_logger", logging.INFO,
     "report-brute_force_euc_dist.log")
   # epsilon_2 = sqrt(2*k_e*(1-T)/n)
   epsilon_2 = sqrt(2*(1-T))
+  # Convert once, every window is a view of this matrix instead of a copy
+  t_series = util.as_time_series_matrix(t_series)
   m = t_series.shape[0]   # number of time series
   num_corr_pairs = 0  # Output
   overall_pruning_rate = 0
   logger_1.info(f"Threshold epsilon_2: {epsilon_2}")
-  # Times for profiling, 6 columns/measurements for max_alpha-1 rows/windows
-  len_ts = t_series.shape[1]
-  max_alpha = floor((len_ts-n)/h)
-  p_times = np.empty((max_alpha + 1, 6))
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  ts_windows = util.sliding_windows(t_series, n, h)
+  # Times for profiling, 6 columns/measurements per processed window
+  p_times = np.empty((len(windows), 6))
 
   # initial windows
   w = [None for _ in range(m)]
   W = [None for _ in range(m)]
 
-  alpha = 0
-  # I assume all time series have the same length
-  while alpha*h <= (len_ts-n):  # I assume all time series have the same length
+  for row, alpha in enumerate(windows):  # I assume all time series have the same length
     # Time before shifting the window (0) for window alpha
-    p_times[alpha, 0] = perf_counter_ns()
+    p_times[row, 0] = perf_counter_ns()
 
     # Shift windows
-    # WARNING: Contrary to usual python slices, both the start and the stop are included
-    w = t_series.loc[:, alpha*h:alpha*h+n-1].to_numpy(dtype='float')
+    w = ts_windows[:, alpha]   # View of shape (m, n)
     x_bar = np.mean(w, axis=1)  # np.ndarray of row means, shape (m,)
     # Normalization
     w_centered = w - x_bar[:, np.newaxis]
@@ -52,18 +52,18 @@ def brute_force_euc_dist(t_series: List[np.ndarray], n: int, h: int, T: float,
     # PAA would be here and return W_s, W_e
 
     # SVD
-    p_times[alpha, 1] = perf_counter_ns()   # Time before SVD
+    p_times[row, 1] = perf_counter_ns()   # Time before SVD
     # SVD would be here and return W_b
 
     # Bucketing filter
-    p_times[alpha, 2] = p_times[alpha, 1]   # Time before bucketing filter
+    p_times[row, 2] = p_times[row, 1]   # Time before bucketing filter
     # Bucketing filter would be here and return C_1
     # Unique pairs of cross product of indices
     C_1 = np.array([(i, j) for i in range(m) for j in range(i + 1, m)])
 
     # Eucledian distance filter
     # Brute-force Euclidean filter directly on W
-    p_times[alpha, 3] = p_times[alpha, 1]   # Time before Euclidean distance filter
+    p_times[row, 3] = p_times[row, 1]   # Time before Euclidean distance filter
     epsilon = sqrt(2*(1-T))
     distances = np.linalg.norm(W[C_1[:, 0]] - W[C_1[:, 1]], axis=1)
     # Check if each distance satisfies the condition
@@ -72,24 +72,13 @@ def brute_force_euc_dist(t_series: List[np.ndarray], n: int, h: int, T: float,
     num_corr_pairs += correlated_pairs.shape[0]
 
     # Computation of Pearson correlation
-    p_times[alpha, 4] = p_times[alpha, 1]   # Time before computing the correlation
+    p_times[row, 4] = p_times[row, 1]   # Time before computing the correlation
     # Computation of Pearson correlation would be here and return correlated
     # window pairs
-    p_times[alpha, 5] = perf_counter_ns()   # Time after computing the correlation
+    p_times[row, 5] = perf_counter_ns()   # Time after computing the correlation
 
-    if alpha == 99:
-      break
-    alpha += 1
-
-  p_means = np.mean(p_times, axis=1)  # Calculate across columns
-  # Calculate mean differences between consecutive columns
-  section_times = np.round([
-    np.mean(p_times[:, 1] - p_times[:, 0]),
-    np.mean(p_times[:, 2] - p_times[:, 1]),
-    np.mean(p_times[:, 3] - p_times[:, 2]),
-    np.mean(p_times[:, 4] - p_times[:, 3]),
-    np.mean(p_times[:, 5] - p_times[:, 4])
-  ]).astype(int)
+  # Only the rows of the processed windows are filled
+  section_times = util.mean_section_times(p_times)
 
   logger_1.info(
     f"Report: In total the data contains {num_corr_pairs} correlated window pairs."
@@ -1,9 +1,13 @@
 # Standard library imports
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from math import floor, ceil
 from itertools import product
+import os
 # Third-party imports
 import numpy as np
 # Local imports
+import util
 
 
 def floor_epsilon(number, eps):
@@ -20,7 +24,32 @@ def ceil_epsilon(number, eps):
   return ceil(number / eps) * eps
 
 
-def get_neighbors(bkt_cords, k_b: int, B:int):
+@lru_cache(maxsize=None)
+def get_moves(k_b: int, half: bool = False):
+  """
+  Generate all moves from a bucket to an adjacent bucket. The result is
+  cached per k_b, so the moves are only generated once.
+
+  Parameters:
+  k_b (int): number of dimensions.
+  half (bool): Return only the lexicographically positive moves, i.e., the
+  moves whose first non-zero component is 1. Every pair of adjacent buckets is
+  connected by exactly one such move.
+
+  Returns:
+  np.ndarray: The moves in lexicographic order, shape (3^k_b - 1, k_b) or
+  ((3^k_b - 1)/2, k_b) for half = True. The array is read-only.
+  """
+  all_moves = np.array(list(product([-1,0,1], repeat=k_b)))
+  # product generates the moves in lexicographic order, thus the zero move is
+  # in the middle and all moves after it are lexicographically positive
+  zero_move = len(all_moves)//2
+  moves = all_moves[zero_move+1:] if half else np.delete(all_moves, zero_move, axis=0)
+  moves.flags.writeable = False
+  return moves
+
+
+def get_neighbors(bkt_cords, k_b: int, B:int, half: bool = False):
   """
   Generate the coordinates for each neighbor of bucket of bkt.
   I start from bkt_cords and generating all moves to an adjacent
@@ -29,94 +58,280 @@ def get_neighbors(bkt_cords, k_b: int, B:int):
   Parameters:
   bkt_cords (tuple): Coordinates of your bucket.
   B (int): The bound of the array (exclusive).
+  half (bool): Return only the neighbors reached by a lexicographically
+  positive move, see get_moves.
 
   Returns:
   list of tuples: A list with the coordinates of all neighbors of bkt.
   """
-  all_moves = list(product([-1,0,1], repeat=k_b))
-  all_moves.remove(k_b*(0,))
   # Adding the moves to the current position gives all virtual neighbors
-  neighbors =  bkt_cords + np.array(all_moves)
+  neighbors =  bkt_cords + get_moves(k_b, half)
   # ... but we must remove the impossible positions
   neighbors = neighbors[((neighbors>=0)&(neighbors<B)).all(axis=1)]
   return [tuple(row) for row in neighbors]
 
 
-def bucketing_filter(W_b, k_b: int, eps):
+def bucket_index(bkt_indices, B: int):
+  """
+  Build a sparse bucket index. Instead of allocating all B^k_b buckets, sort
+  the time series by the linearized coordinates of their bucket and use the
+  runs of equal keys as buckets, so only occupied buckets are stored.
+
+  Parameters:
+  bkt_indices (np.ndarray): The bucket coordinates of each time series, shape (m, k_b).
+  B (int): The number of partitions per dimension.
+
+  Returns:
+  tuple:
+    - order (np.ndarray): Time series indices sorted by bucket key. Within a
+      bucket the indices are ascending.
+    - bkt_keys (np.ndarray): The sorted linearized keys of the occupied buckets.
+    - starts (np.ndarray): Position of each occupied bucket's first time series in order.
+    - counts (np.ndarray): The number of time series in each occupied bucket.
+  """
+  dims = bkt_indices.shape[1]*(int(B),)
+  keys = np.ravel_multi_index(tuple(bkt_indices.T), dims)
+  order = np.argsort(keys, kind='stable')
+  bkt_keys, starts, counts = np.unique(keys[order], return_index=True,
+    return_counts=True)
+  return order, bkt_keys, starts, counts
+
+
+def expand_pair_counts(pair_counts, chunk_size: int):
   """
+  Enumerate the pairs of several groups of pairs in chunks. Group g contains
+  pair_counts[g] pairs, the pairs of all groups are numbered consecutively.
+
   Parameters:
-  W_b (numpy.ndarray): Matrix of windows.
+  pair_counts (np.ndarray): The number of pairs of each group.
+  chunk_size (int): The maximum number of pairs per chunk.
+
+  Yields:
+  tuple: For each chunk, the group of each pair and the index of each pair
+  within its group, both np.ndarrays of at most chunk_size elements.
+  """
+  ends = np.cumsum(pair_counts, dtype=np.int64)
+  total = int(ends[-1]) if len(ends) > 0 else 0
+  for lo in range(0, total, chunk_size):
+    idx = np.arange(lo, min(lo + chunk_size, total), dtype=np.int64)
+    group = np.searchsorted(ends, idx, side='right')
+    yield group, idx - (ends[group] - pair_counts[group])
+
+
+def bucket_pairs(bkt_keys, BKT_dim, k_b: int):
+  """
+  Find all pairs of adjacent occupied buckets, each pair once.
+
+  Parameters:
+  bkt_keys (np.ndarray): The sorted linearized keys of the occupied buckets.
+  BKT_dim (tuple): The dimensions of the bucketing scheme.
   k_b (int): number of dimensions.
-  eps (float): distance threshold ε
 
   Returns:
-  C_1 (np.ndarray): Candidate set of indices of likely correlated pairs of windows. 
-  Each row contains one candidate pair, i.e. the matrix has two columns.
-  join_pruning_rate (float): The pruning rate from the bucketing filter.
+  tuple: Two np.ndarrays with the positions in bkt_keys of the first and the
+  second bucket of each pair.
   """
-  m = len(W_b)
-  # Initialize C_1 as an empty array, because otherwise it might never be intialized
-  C_1 = []  # Array of ndarrays with shape: (n, 2)
+  bkt_cords = np.column_stack(np.unravel_index(bkt_keys, BKT_dim))   # Shape: (u, k_b)
+  moves = get_moves(k_b, half=True)
+  # Coordinates of all virtual neighbors, shape (u, number of moves, k_b)
+  nb_cords = bkt_cords[:, np.newaxis, :] + moves[np.newaxis, :, :]
+  # ... but we must remove the impossible positions
+  a, move = np.nonzero(((nb_cords >= 0) & (nb_cords < np.array(BKT_dim))).all(axis=2))
+  nb_keys = np.ravel_multi_index(tuple(nb_cords[a, move].T), BKT_dim)
+  # Look up the occupied neighbors in the sorted keys
+  b = np.minimum(np.searchsorted(bkt_keys, nb_keys), len(bkt_keys) - 1)
+  occupied = bkt_keys[b] == nb_keys
+  return a[occupied], b[occupied]
 
-  # Initialize k_b-dimensional bucketing scheme
+
+def bucketing_scheme(W_b, k_b: int, eps):
+  """
+  Initialize the k_b-dimensional bucketing scheme and assign the time series
+  in W_b to a bucket.
+
+  Returns:
+  tuple: The dimensions of the bucketing scheme and the sparse bucket index,
+  see bucket_index.
+  """
   bkt_lwr_bnd = floor_epsilon(np.min(W_b), eps)
   bkt_upr_bnd = ceil_epsilon(np.max(W_b), eps)
   B = round((bkt_upr_bnd - bkt_lwr_bnd)/eps)  # number of partitions
   BKT_dim = k_b*(int(B),)
-  BKT = np.full(BKT_dim, fill_value=None, dtype=object)  # Each bucket contains a list of time series indices, thus dtype=object
-
-  # Assign time series in W_b to a bucket
   # Compute the bucket indices for all time series
   bkt_indices = np.floor_divide(np.subtract(W_b, bkt_lwr_bnd), eps).astype(int)
-  for p, bkt in enumerate(bkt_indices):
-    bkt_tuple = tuple(bkt)
-    if BKT[bkt_tuple] is None:
-      BKT[bkt_tuple] = [p]
-    else:
-      BKT[bkt_tuple].append(p)
+  return BKT_dim, bucket_index(bkt_indices, B)
 
-  # Compare time series in buckets
-  for index, bkt in np.ndenumerate(BKT):
-    if bkt is None:
+
+def bucketing_work(counts, a, b):
+  """
+  Count the distance computations of the bucketing filter, i.e., the pairs
+  within a bucket and between adjacent buckets. This only needs the bucket
+  index and doesn't compute any distances.
+
+  Parameters:
+  counts (np.ndarray): The number of time series in each occupied bucket.
+  a, b (np.ndarray): The pairs of adjacent buckets, see bucket_pairs.
+
+  Returns:
+  int: The number of pairs the bucketing filter compares.
+  """
+  counts = counts.astype(np.int64)
+  return int(np.sum(counts*(counts - 1)//2) + np.sum(counts[a]*counts[b]))
+
+
+def filter_pairs(W_b, i, j, eps):
+  """
+  Keep the pairs (i, j) whose windows are within distance eps.
+
+  Returns:
+  np.ndarray: The remaining pairs, one per row.
+  """
+  mask = np.linalg.norm(W_b[i] - W_b[j], axis=1) <= eps
+  return np.column_stack((i[mask], j[mask]))
+
+
+def filter_sorted_pairs(W_sorted, order, s, t, eps):
+  """
+  Like filter_pairs for the pairs (s, t) of sorted positions of the bucket
+  index, with W_sorted = W_b[order]. Only the remaining pairs are mapped to
+  time series indices.
+
+  Returns:
+  np.ndarray: The remaining pairs (i, j) with i < j, one per row.
+  """
+  mask = np.linalg.norm(W_sorted[s] - W_sorted[t], axis=1) <= eps
+  i, j = order[s[mask]], order[t[mask]]
+  return np.column_stack((np.minimum(i, j), np.maximum(i, j)))
+
+
+def block_distances(X, Y):
+  """
+  Compute the Euclidean distances between each row of X and each row of Y.
+  The squares are summed dimension by dimension in the order of
+  np.linalg.norm, so the distances are the same, without a temporary of shape
+  (len(X), len(Y), k_b).
+
+  Returns:
+  np.ndarray: The distance matrix of shape (len(X), len(Y)).
+  """
+  sq_dist = np.zeros((len(X), len(Y)), dtype=np.result_type(X, Y))
+  for d in range(X.shape[1]):
+    diff = np.subtract.outer(X[:, d], Y[:, d])
+    sq_dist += np.square(diff, out=diff)
+  return np.sqrt(sq_dist, out=sq_dist)
+
+
+def group_runs(dense):
+  """
+  Split groups of pairs into the ranges that bucket_partition_candidates
+  processes in one step: each dense group on its own, consecutive sparse
+  groups together.
+
+  Parameters:
+  dense (np.ndarray): Whether each group is dense.
+
+  Yields:
+  tuple: The range of groups and whether it is a dense group.
+  """
+  lo = 0
+  for g in np.flatnonzero(dense):
+    if lo < g:
+      yield lo, g, False
+    yield g, g + 1, True
+    lo = g + 1
+  if lo < len(dense):
+    yield lo, len(dense), False
+
+
+def bucket_partition_candidates(W_b, order, starts, counts, a, b, u_lo: int,
+  u_hi: int, eps, chunk_size: int, block_pairs: int = 2**9):
+  """
+  Compute the candidate pairs of a partition of the occupied buckets, i.e.,
+  the pairs within the buckets u_lo to u_hi - 1 and the pairs between these
+  buckets and their adjacent buckets, if the move to the adjacent bucket is
+  positive. The partitions of disjoint bucket ranges are disjoint.
+  Buckets and pairs of adjacent buckets with at least block_pairs pairs are
+  compared as blocks of contiguous rows of W_b sorted by bucket, the others
+  are enumerated pair by pair in chunks. Both give the pairs in the same
+  order.
+
+  Parameters:
+  W_b (numpy.ndarray): Matrix of windows.
+  order, starts, counts: The sparse bucket index, see bucket_index.
+  a, b (np.ndarray): The pairs of adjacent buckets, see bucket_pairs.
+  u_lo, u_hi (int): The range of buckets of the partition.
+  eps (float): distance threshold ε
+  chunk_size (int): The maximum number of pairs per vectorized call.
+  block_pairs (int): The minimum number of pairs of a dense bucket or pair
+  of buckets.
+
+  Returns:
+  tuple: Two lists of np.ndarrays with the candidate pairs within the buckets
+  and between adjacent buckets.
+  """
+  C_same, C_neighbors = [], []
+  # Rows of sorted position s, bucket u is W_sorted[starts[u]:starts[u]+counts[u]]
+  W_sorted = W_b[order]
+  counts = counts.astype(np.int64)
+
+  # Same bucket comparisons: the time series at sorted position s is compared
+  # to the time series after it in the same bucket
+  for g_lo, g_hi, dense in group_runs(counts[u_lo:u_hi]*(counts[u_lo:u_hi] - 1)//2 >= block_pairs):
+    g_lo, g_hi = u_lo + g_lo, u_lo + g_hi
+    if dense:
+      lo, hi = starts[g_lo], starts[g_lo] + counts[g_lo]
+      rows = max(1, chunk_size // counts[g_lo])
+      for r in range(lo, hi, rows):
+        # Compare rows r to r + rows - 1 with the rows after r, keep the
+        # upper triangle
+        r_hi = min(r + rows, hi)
+        mask = np.triu(block_distances(W_sorted[r:r_hi], W_sorted[r+1:hi]) <= eps)
+        s, t = np.nonzero(mask)
+        C_same.append(np.column_stack((order[r + s], order[r + 1 + t])))
+      continue
+    s_lo = starts[g_lo]
+    bkt_ends = np.repeat(starts[g_lo:g_hi] + counts[g_lo:g_hi], counts[g_lo:g_hi])
+    s_range = s_lo + np.arange(len(bkt_ends))
+    for s, offset in expand_pair_counts(bkt_ends - s_range - 1, chunk_size):
+      s = s_lo + s
+      C_same.append(filter_sorted_pairs(W_sorted, order, s, s + 1 + offset, eps))
+
+  # Neighboring bucket comparisons: all pairs between adjacent buckets a and b.
+  # The pairs are sorted by a, thus the pairs of the partition are contiguous.
+  p_lo, p_hi = np.searchsorted(a, [u_lo, u_hi])
+  a, b = a[p_lo:p_hi], b[p_lo:p_hi]
+  pair_counts = counts[a]*counts[b]
+  for g_lo, g_hi, dense in group_runs(pair_counts >= block_pairs):
+    if dense:
+      lo_a, lo_b = starts[a[g_lo]], starts[b[g_lo]]
+      hi_a, hi_b = lo_a + counts[a[g_lo]], lo_b + counts[b[g_lo]]
+      rows = max(1, chunk_size // counts[b[g_lo]])
+      for r in range(lo_a, hi_a, rows):
+        r_hi = min(r + rows, hi_a)
+        s, t = np.nonzero(block_distances(W_sorted[r:r_hi], W_sorted[lo_b:hi_b]) <= eps)
+        i, j = order[r + s], order[lo_b + t]
+        # Orient the pairs such that i < j
+        C_neighbors.append(np.column_stack((np.minimum(i, j), np.maximum(i, j))))
       continue
-    bkt = np.array(bkt)  # Convert to NumPy array for vectorization
-
-    if len(bkt) > 1:
-      # Same bucket comparisons
-      i, j = np.triu_indices(len(bkt), k=1)   # Get indices for upper triangle of matrix with offset k = 1
-      # Store distance for every comparison
-      dist_matrix = np.linalg.norm(W_b[bkt[i]] - W_b[bkt[j]], axis=1)
-      # If the distance of a pair bkt[i], bkt[j] is <= eps, return bkt[i] in a new array. 
-      # Do the same with j.
-      # Stacking the arrays on top of each other and taking the transpose puts 
-      # each candidate pair into a row.
-      C_1.append(np.vstack((bkt[i][dist_matrix <= eps], bkt[j][dist_matrix <= eps])).T)
-    
-    if len(bkt) > 0:
-      # Neighboring bucket comparisons
-      neighbors = get_neighbors(np.array(index), k_b, B)
-      C_1_neighbors = [[], []]
-      for neighbor in neighbors:
-        neighbor_bkt = BKT[neighbor]
-        if neighbor_bkt is None:
-          continue
-        neighbor_bkt = np.array(neighbor_bkt)
-
-        # Calculate all pairwise distances between bkt and neighbor_bkt
-        distances = np.linalg.norm(W_b[bkt[:, None]] - W_b[neighbor_bkt], axis=2)  # Shape: (len(bkt), len(neighbor_bkt))
-        # Create a mask for pairs within the epsilon distance
-        mask = distances <= eps  # Shape: (len(bkt), len(neighbor_bkt))
-        i_vals, j_vals = np.where(mask)  # Indices where the condition is met
-        # Map the indices back to the original values in bkt and neighbor_bkt
-        i_vals = bkt[i_vals]
-        j_vals = neighbor_bkt[j_vals]
-        # Keep only pairs where i < j
-        valid_pairs_mask = i_vals < j_vals
-        i_vals = i_vals[valid_pairs_mask]
-        j_vals = j_vals[valid_pairs_mask]
-        # Add the valid pairs as new columns to `C_1`
-        C_1.append(np.vstack((i_vals, j_vals)).T)
+    a_run, b_run = a[g_lo:g_hi], b[g_lo:g_hi]
+    for pair, offset in expand_pair_counts(pair_counts[g_lo:g_hi], chunk_size):
+      s = starts[a_run[pair]] + offset // counts[b_run[pair]]
+      t = starts[b_run[pair]] + offset % counts[b_run[pair]]
+      C_neighbors.append(filter_sorted_pairs(W_sorted, order, s, t, eps))
+  return C_same, C_neighbors
+
+
+def candidate_set(C_1, m: int):
+  """
+  Stack the candidate pairs and compute the pruning rate.
+
+  Parameters:
+  C_1 (list): np.ndarrays with candidate pairs, one pair per row.
+  m (int): The number of time series.
 
+  Returns:
+  tuple: C_1 as a single np.ndarray and the join pruning rate.
+  """
   join_pruning_rate = 0
   if C_1:
     C_1 = np.vstack(C_1)
@@ -126,6 +341,286 @@ def bucketing_filter(W_b, k_b: int, eps):
   return C_1, join_pruning_rate
 
 
+def bucketing_filter(W_b, k_b: int, eps, chunk_size: int = 2**18,
+  block_pairs: int = 2**9):
+  """
+  Parameters:
+  W_b (numpy.ndarray): Matrix of windows.
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+  chunk_size (int): The maximum number of pairs whose distance is computed
+  with one vectorized call. This caps the peak memory of the filter.
+  block_pairs (int): Compare buckets with at least this many pairs as blocks,
+  see bucket_partition_candidates.
+
+  Returns:
+  C_1 (np.ndarray): Candidate set of indices of likely correlated pairs of windows. 
+  Each row contains one candidate pair, i.e. the matrix has two columns.
+  join_pruning_rate (float): The pruning rate from the bucketing filter.
+  """
+  # Only occupied buckets are stored, bucket u contains order[starts[u]:starts[u]+counts[u]]
+  BKT_dim, (order, bkt_keys, starts, counts) = bucketing_scheme(W_b, k_b, eps)
+  a, b = bucket_pairs(bkt_keys, BKT_dim, k_b)
+  # All buckets form a single partition
+  C_same, C_neighbors = bucket_partition_candidates(W_b, order, starts, counts,
+    a, b, 0, len(bkt_keys), eps, chunk_size, block_pairs)
+  return candidate_set(C_same + C_neighbors, len(W_b))
+
+
+def partition_buckets(counts, a, b, num_parts: int):
+  """
+  Split the occupied buckets into contiguous ranges with about the same
+  number of comparisons, see bucket_partition_candidates.
+
+  Returns:
+  np.ndarray: The num_parts + 1 bounds of the bucket ranges.
+  """
+  counts = counts.astype(np.int64)
+  work = counts*(counts - 1)//2
+  np.add.at(work, a, counts[a]*counts[b])
+  cum_work = np.concatenate(([0], np.cumsum(work)))
+  targets = np.linspace(0, cum_work[-1], num_parts + 1)
+  bounds = np.searchsorted(cum_work, targets)
+  bounds[0], bounds[-1] = 0, len(counts)
+  return np.maximum.accumulate(bounds)
+
+
+def shared_bucket_partition_candidates(shm_name: str, shape, dtype, *args):
+  """
+  Run bucket_partition_candidates on W_b in shared memory. This is the task
+  of one worker process of parallel_bucketing_filter.
+  """
+  shm, W_b = util.attach_shared_array(shm_name, shape, dtype)
+  try:
+    return bucket_partition_candidates(W_b, *args)
+  finally:
+    del W_b
+    shm.close()
+
+
+def parallel_bucketing_filter(W_b, k_b: int, eps, workers = None,
+  executor: str = "process", chunk_size: int = 2**18):
+  """
+  Bucketing filter on several cores. The occupied buckets are split into
+  disjoint partitions with about the same number of comparisons, each worker
+  computes the candidate pairs of one partition. The merged C_1 equals the
+  result of bucketing_filter, including the order of the pairs.
+
+  Parameters:
+  W_b (numpy.ndarray): Matrix of windows.
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+  workers (int): The number of workers. Defaults to the number of CPUs.
+  executor (str): "process" copies W_b once into shared memory for worker
+  processes, "thread" shares W_b read-only between worker threads. Threads
+  only run in parallel while NumPy releases the GIL, which the many small
+  calls per chunk rarely allow, so processes are the default.
+  chunk_size (int): See bucketing_filter.
+
+  Returns:
+  C_1 (np.ndarray): Candidate set of indices of likely correlated pairs of windows.
+  join_pruning_rate (float): The pruning rate from the bucketing filter.
+  """
+  workers = os.cpu_count() if workers is None else workers
+  BKT_dim, (order, bkt_keys, starts, counts) = bucketing_scheme(W_b, k_b, eps)
+  a, b = bucket_pairs(bkt_keys, BKT_dim, k_b)
+  bounds = partition_buckets(counts, a, b, workers)
+  partitions = [(u_lo, u_hi) for u_lo, u_hi in zip(bounds[:-1], bounds[1:])]
+  args = (order, starts, counts, a, b)
+
+  if executor == "thread":
+    W_b = W_b.view()
+    W_b.flags.writeable = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+      results = list(pool.map(lambda bucket_range: bucket_partition_candidates(
+        W_b, *args, *bucket_range, eps, chunk_size), partitions))
+  elif executor == "process":
+    shm, W_b = util.share_array(np.ascontiguousarray(W_b))
+    try:
+      with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(shared_bucket_partition_candidates, shm.name,
+          W_b.shape, W_b.dtype, *args, u_lo, u_hi, eps, chunk_size)
+          for u_lo, u_hi in partitions]
+        results = [future.result() for future in futures]
+    finally:
+      del W_b
+      shm.close()
+      shm.unlink()
+  else:
+    raise ValueError(f"Choose executor 'thread' or 'process'. You chose {executor}")
+
+  # Same order as bucketing_filter: all same bucket pairs, then all neighbors
+  C_1 = [C for C_same, _ in results for C in C_same]
+  C_1 += [C for _, C_neighbors in results for C in C_neighbors]
+  return candidate_set(C_1, len(order))
+
+
+class BucketIndex:
+  """
+  Bucketing filter with a bucket index that persists across windows. The
+  grid is anchored at 0 instead of the minimum of W_b, so the bucket of a time
+  series only changes if its own window moves by about eps. Per window, only
+  the time series whose bucket changed are moved in the index and the pairs
+  of adjacent buckets are only updated for buckets that became occupied or
+  empty. The index is rebuilt from scratch if too many time series move or a
+  bucket leaves the extent of the index.
+  The candidates are the same as those of bucketing_filter, because the
+  candidate pairs don't depend on the origin of the grid. Few time series move
+  only if W_b is oriented consistently between windows, e.g., with
+  svd.IncrementalSVD.
+
+  Parameters:
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+  rebuild_fraction (float): Rebuild the index if more than this fraction of
+  the time series changes its bucket.
+  margin (int): The number of buckets the extent of the index reaches beyond
+  the occupied buckets on each side.
+  chunk_size (int): See bucketing_filter.
+  """
+
+  def __init__(self, k_b: int, eps, rebuild_fraction: float = 0.25,
+    margin: int = 2, chunk_size: int = 2**18):
+    self.k_b = k_b
+    self.eps = eps
+    self.rebuild_fraction = rebuild_fraction
+    self.margin = margin
+    self.chunk_size = chunk_size
+    self.reset()
+
+  def reset(self):
+    """
+    Forget the index, the next window rebuilds it.
+    """
+    self.cords = None   # Bucket coordinates of each time series, shape (m, k_b)
+    self.lo, self.dims = None, None   # Extent of the index
+    # Bucket key*m + time series index of each time series, sorted
+    self.entries = None
+    # The sparse bucket index, see bucket_index
+    self.order, self.bkt_keys, self.starts, self.counts = None, None, None, None
+    # Keys of all pairs of adjacent occupied buckets, sorted by the first key,
+    # and their positions in bkt_keys, see bucket_pairs
+    self.adjacent = None
+    self.a, self.b = None, None
+    self.num_rebuilds = 0
+    self.num_moved = 0
+
+  def filter(self, W_b, k_b: int, eps):
+    """
+    Update the index with the next window and compute its candidate pairs.
+    Same signature and result as bucketing_filter.
+    """
+    if k_b != self.k_b or eps != self.eps:
+      self.k_b, self.eps = k_b, eps
+      self.reset()
+    self.update(np.floor_divide(W_b, eps).astype(np.int64))
+    C_same, C_neighbors = bucket_partition_candidates(W_b, self.order,
+      self.starts, self.counts, self.a, self.b, 0, len(self.bkt_keys), eps,
+      self.chunk_size)
+    return candidate_set(C_same + C_neighbors, len(W_b))
+
+  def __call__(self, W_b, k_b: int, eps):
+    """
+    Same as filter, such that the index can be used as a candidate filter
+    backend, see candidate_filter.get_candidate_filter.
+    """
+    return self.filter(W_b, k_b, eps)
+
+  def update(self, cords):
+    """
+    Move the time series to the buckets with the given coordinates.
+
+    Parameters:
+    cords (np.ndarray): The bucket coordinates of each time series, shape (m, k_b).
+    """
+    if self.cords is None or self.cords.shape != cords.shape:
+      self._rebuild(cords)
+      return
+    moved = np.flatnonzero((cords != self.cords).any(axis=1))
+    outside = ((cords[moved] < self.lo) | (cords[moved] >= self.lo + self.dims)).any()
+    if outside or len(moved) > self.rebuild_fraction*len(cords):
+      self._rebuild(cords)
+      return
+    self.num_moved += len(moved)
+    if len(moved) == 0:
+      return
+    m = len(cords)
+    # Remove the moved time series and insert them at their new position
+    old_entries = self._keys(self.cords[moved])*m + moved
+    new_entries = np.sort(self._keys(cords[moved])*m + moved)
+    entries = np.delete(self.entries, np.searchsorted(self.entries, old_entries))
+    self.entries = np.insert(entries, np.searchsorted(entries, new_entries), new_entries)
+    self.cords = cords
+    old_bkt_keys = self.bkt_keys
+    self._update_buckets()
+    emptied = np.setdiff1d(old_bkt_keys, self.bkt_keys, assume_unique=True)
+    created = np.setdiff1d(self.bkt_keys, old_bkt_keys, assume_unique=True)
+    if len(emptied) > 0 or len(created) > 0:
+      self._update_adjacent(emptied, created)
+
+  def _keys(self, cords):
+    """
+    Linearize bucket coordinates within the extent of the index.
+    """
+    return np.ravel_multi_index(tuple((cords - self.lo).T), self.dims).astype(np.int64)
+
+  def _rebuild(self, cords):
+    """
+    Build the index from scratch.
+    """
+    m = len(cords)
+    self.num_rebuilds += 1
+    self.lo = cords.min(axis=0) - self.margin
+    self.dims = tuple(int(d) for d in cords.max(axis=0) + self.margin + 1 - self.lo)
+    self.cords = cords
+    self.entries = np.sort(self._keys(cords)*m + np.arange(m))
+    self._update_buckets()
+    self.a, self.b = bucket_pairs(self.bkt_keys, self.dims, self.k_b)
+    self.adjacent = (self.bkt_keys[self.a], self.bkt_keys[self.b])
+
+  def _update_buckets(self):
+    """
+    Derive the sparse bucket index from the sorted entries.
+    """
+    m = len(self.cords)
+    keys = self.entries // m
+    self.order = self.entries % m
+    self.starts = np.flatnonzero(np.diff(keys, prepend=-1))
+    self.counts = np.diff(self.starts, append=m)
+    self.bkt_keys = keys[self.starts]
+
+  def _update_adjacent(self, emptied, created):
+    """
+    Drop the pairs of adjacent buckets with an emptied bucket and add the pairs
+    with a created bucket.
+    """
+    first, second = self.adjacent
+    keep = ~(np.isin(first, emptied) | np.isin(second, emptied))
+    first, second = first[keep], second[keep]
+    if len(created) > 0:
+      moves = get_moves(self.k_b)
+      created_cords = np.column_stack(np.unravel_index(created, self.dims))
+      nb_cords = created_cords[:, np.newaxis, :] + moves[np.newaxis, :, :]
+      c, move = np.nonzero(((nb_cords >= 0) & (nb_cords < np.array(self.dims))).all(axis=2))
+      nb_keys = np.ravel_multi_index(tuple(nb_cords[c, move].T), self.dims)
+      pos = np.minimum(np.searchsorted(self.bkt_keys, nb_keys), len(self.bkt_keys) - 1)
+      occupied = self.bkt_keys[pos] == nb_keys
+      # The moves after the middle of get_moves are positive, a positive move
+      # increases the key. Pairs of two created buckets are found from both
+      # sides, keep the one with the positive move.
+      positive = move >= len(moves)//2
+      keep = occupied & (positive | ~np.isin(nb_keys, created))
+      c_keys, nb_keys, positive = created[c[keep]], nb_keys[keep], positive[keep]
+      first = np.concatenate((first, np.where(positive, c_keys, nb_keys)))
+      second = np.concatenate((second, np.where(positive, nb_keys, c_keys)))
+      sort = np.lexsort((second, first))
+      first, second = first[sort], second[sort]
+    self.adjacent = (first, second)
+    # The positions of the buckets changed
+    self.a = np.searchsorted(self.bkt_keys, first)
+    self.b = np.searchsorted(self.bkt_keys, second)
+
+
 # Bucketing filter true to the pseudo code by Alizade Nikoo et al.
 def bucketing_filter_unoptimized(W_b, k_b: int, eps):
   """
@@ -0,0 +1,103 @@
+# Standard library imports
+# Third-party imports
+from scipy.spatial import cKDTree
+# Local imports
+from bucketing_filter import (BucketIndex, bucket_pairs, bucket_partition_candidates,
+  bucketing_filter, bucketing_scheme, bucketing_work, candidate_set, filter_pairs,
+  parallel_bucketing_filter)
+
+
+def kdtree_filter(W_b, k_b: int, eps):
+  """
+  Candidate generation with a KD-tree instead of buckets. The tree only
+  visits the part of W_b around each window, so it doesn't degrade when eps is
+  large relative to the spread of W_b and most windows share a few buckets.
+
+  Parameters:
+  W_b (numpy.ndarray): Matrix of windows.
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+
+  Returns:
+  C_1 (np.ndarray): Candidate set of indices of likely correlated pairs of windows.
+  Each row contains one candidate pair (i, j) with i < j.
+  join_pruning_rate (float): The pruning rate of the filter.
+  """
+  m = len(W_b)
+  tree = cKDTree(W_b)
+  # Query with a slightly larger radius and check the distances the same way
+  # as bucketing_filter, such that both backends yield the same candidates
+  C_1 = tree.query_pairs(r=eps*(1 + 1e-9), output_type='ndarray')
+  C_1 = filter_pairs(W_b, C_1[:, 0], C_1[:, 1], eps)
+  join_pruning_rate = 1 - C_1.shape[0]/((pow(m, 2)-m)/2) if m > 1 else 0
+  return C_1, join_pruning_rate
+
+
+def auto_filter(W_b, k_b: int, eps, max_work_per_window: float = 64,
+  chunk_size: int = 2**18):
+  """
+  Choose between the bucketing filter and the KD-tree per window. The bucket
+  index is built once, the work of the bucketing filter is estimated from the
+  occupancy of its buckets, and the KD-tree is used if the bucketing filter
+  would compare each window to more than max_work_per_window other windows on
+  average. That happens for low T, when almost all windows land in a few
+  buckets. Otherwise the candidates are computed from the same index.
+
+  Parameters:
+  W_b (numpy.ndarray): Matrix of windows.
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+  max_work_per_window (float): The average number of comparisons per window
+  above which the KD-tree is used.
+  chunk_size (int): See bucketing_filter.
+
+  Returns:
+  C_1 (np.ndarray): Candidate set of indices of likely correlated pairs of windows.
+  join_pruning_rate (float): The pruning rate of the filter.
+  """
+  BKT_dim, (order, bkt_keys, starts, counts) = bucketing_scheme(W_b, k_b, eps)
+  a, b = bucket_pairs(bkt_keys, BKT_dim, k_b)
+  if bucketing_work(counts, a, b) > max_work_per_window*len(W_b):
+    return kdtree_filter(W_b, k_b, eps)
+  C_same, C_neighbors = bucket_partition_candidates(W_b, order, starts, counts,
+    a, b, 0, len(bkt_keys), eps, chunk_size)
+  return candidate_set(C_same + C_neighbors, len(W_b))
+
+
+# Candidate generation backends with the signature of bucketing_filter
+candidate_filters = {
+  "bucketing": bucketing_filter,
+  "kdtree": kdtree_filter,
+  "parallel_bucketing": parallel_bucketing_filter,
+  "auto": auto_filter,
+}
+
+# Candidate generation backends that keep state across windows. They are
+# created with (k_b, eps) and are called like bucketing_filter.
+stateful_candidate_filters = {
+  "incremental_bucketing": BucketIndex,
+}
+
+
+def get_candidate_filter(name: str, k_b: int, eps):
+  """
+  Select a candidate generation backend by name. Select it once per run and
+  call it once per window, in the order of the windows, since the stateful
+  backends reuse the previous window.
+
+  Parameters:
+  name (str): "bucketing", "kdtree", "parallel_bucketing", "auto", see
+  auto_filter, or "incremental_bucketing", which keeps the bucket index across
+  windows, see bucketing_filter.BucketIndex.
+  k_b (int): number of dimensions.
+  eps (float): distance threshold ε
+
+  Returns:
+  function: The backend, call it with (W_b, k_b, eps).
+  """
+  if name in stateful_candidate_filters:
+    return stateful_candidate_filters[name](k_b, eps)
+  if name not in candidate_filters:
+    raise ValueError(f"Unknown filter backend {name}, choose one of "
+      f"{list(candidate_filters) + list(stateful_candidate_filters)}")
+  return candidate_filters[name]
@@ -1,127 +1,406 @@
 # Standard library imports
 import logging
-from math import floor, sqrt
+from math import ceil, sqrt
 from time import perf_counter_ns
 # Third-party imports
 import numpy as np
 import pandas as pd
 from scipy.stats import pearsonr
 # Local imports
-from bucketing_filter import bucketing_filter, bucketing_filter_unoptimized
-from paa import paa_pyts, paa_pyts_unoptimized
-from svd import custom_svd
+from bucketing_filter import bucketing_filter_unoptimized
+from candidate_filter import get_candidate_filter
+from inc_p import running_sums, update_running_sums
+from paa import (IncrementalPAA, coarsen_paa, paa_multi_resolution, paa_reshape,
+  paa_pyts_unoptimized)
+from svd import IncrementalSVD, custom_svd, svd_backends
+from verification import euclidean_filter, verify_pairs
 import util
 
 
-def corr_join(t_series, n: int, h: int, T: float, k_s: int, k_e: int, k_b: int):
+def normalize_windows(w):
+  """
+  Normalize each window to mean 0 and L2 norm 1.
+
+  Parameters:
+  w (np.ndarray): The raw windows, a matrix of shape (m, n).
+
+  Returns:
+  np.ndarray: The normalized windows W, shape (m, n).
+  """
+  x_bar = np.mean(w, axis=1)  # np.ndarray of row means, shape (m,)
+  # Subtract x_bar from each row using broadcasting
+  w_centered = w - x_bar[:, np.newaxis]
+  # Square element-wise, sum each row, compute square root element-wise
+  denominator = np.sqrt(np.sum(np.power(w_centered, 2), axis=1))  # np.ndarray of shape (m,)
+  return np.divide(w_centered, denominator[:, np.newaxis])
+
+
+class WindowPrefix:
+  """
+  The stages of CorrJoin that don't depend on T: the normalization, the PAA
+  and the SVD of each window. corr_join, corr_join_sweep and
+  corr_join_stream.CorrJoinStream share them through this class and only
+  implement the filters and the verification.
+  Call transform once per window in the order of the windows, the
+  incremental modes update the state of the previous window.
+
+  Parameters:
+  n, h, k_s, k_e, k_b: See util.get_params.
+  incremental, svd_backend, dtype: See corr_join.
+  """
+
+  def __init__(self, n: int, h: int, k_s: int, k_e: int, k_b: int,
+    incremental: bool = False, svd_backend: str = "exact", dtype = np.float64):
+    if svd_backend not in list(svd_backends) + ["incremental"]:
+      raise ValueError(f"Unknown SVD backend {svd_backend}, choose one of {list(svd_backends) + ['incremental']}")
+    self.n, self.h = n, h
+    self.k_s, self.k_e, self.k_b = k_s, k_e, k_b
+    self.incremental = incremental
+    self.svd_backend = svd_backend
+    self.dtype = dtype
+    # Running sums s_1 and s_2 from inc_p for incremental normalization. After
+    # refresh_interval windows no sample of the last recomputation is left.
+    self.s_1, self.s_2 = None, None
+    self.refresh_interval = ceil(n/h) if h < n else 1
+    self.shift = None   # The row means of the last recomputation
+    self.leaving = None   # The first h samples of the previous window
+    self.num_windows = 0
+    # With k_s | k_e, W_s is derived from W_e instead of a second pass over W
+    self.fused_paa = k_e%k_s == 0
+    if incremental:
+      self.paa_s = None if self.fused_paa else IncrementalPAA(n, k_s, h)
+      self.paa_e = IncrementalPAA(n, k_e, h)
+    self.incremental_svd = IncrementalSVD(k_b) if svd_backend == "incremental" else None
+    # The last raw window if incremental, otherwise the normalized windows W
+    # of shape (m, n)
+    self.w, self.W = None, None
+
+  def transform(self, w, times = None):
+    """
+    Normalize the next window and compute its PAA and SVD.
+
+    Parameters:
+    w (np.ndarray): The raw window of each time series, shape (m, n).
+    times (np.ndarray): A row of the profiling times of corr_join. Columns 0,
+    1 and 2 receive the time before shifting the window, before the SVD and
+    before the bucketing filter.
+
+    Returns:
+    tuple: W_s, W_e and W_b of the window. The normalized windows are
+    available through pair_rows.
+    """
+    times = np.empty(3) if times is None else times
+    times[0] = perf_counter_ns()   # Time before shifting the window
+    n, h = self.n, self.h
+    if self.incremental:
+      if self.num_windows % self.refresh_interval == 0:
+        # Accumulate the sums of w - shift with the row means of the refresh
+        # window as shift, raw sums cancel for time series with large offsets
+        self.shift = np.mean(w, axis=1, dtype=np.float64)
+        self.s_1, self.s_2 = running_sums(w, self.shift)
+      else:
+        # The first h samples of the previous window leave, the last h samples
+        # of the current window enter
+        self.s_1, self.s_2 = update_running_sums(self.s_1, self.s_2,
+          self.leaving, w[:, n-h:], self.shift)
+      self.leaving = w[:, :h].copy()
+      d = self.s_1/n   # Distance of the row means from the shift, shape (m,)
+      # sum((w - x_bar)^2) = s_2 - s_1*d, clip negative rounding errors
+      denominator = np.sqrt(np.maximum(self.s_2 - self.s_1*d, 0)).astype(self.dtype, copy=False)
+      # The sums are float64, normalize in dtype
+      x_bar = (self.shift + d).astype(self.dtype, copy=False)
+      # The PAA only needs x_bar and the denominator, the verification only
+      # the rows of C_2, so W isn't computed, see pair_rows
+      self.w = w
+      self.W = None
+    else:
+      self.W = normalize_windows(w)   # np.ndarray of shape (m, n)
+    self.num_windows += 1
+    # PAA
+    if self.incremental:
+      W_e = self.paa_e.transform(w, x_bar, denominator)   # np.ndarray of shape (m, k_e)
+      if self.fused_paa:
+        W_s = coarsen_paa(W_e, self.k_e, self.k_s)   # np.ndarray of shape (m, k_s)
+      else:
+        W_s = self.paa_s.transform(w, x_bar, denominator)
+    elif self.fused_paa:
+      W_s, W_e = paa_multi_resolution(self.W, n, self.k_s, self.k_e)
+    else:
+      W_s = paa_reshape(self.W, n, self.k_s)   # np.ndarray of shape (m, k_s)
+      W_e = paa_reshape(self.W, n, self.k_e)   # np.ndarray of shape (m, k_e)
+
+    # SVD
+    times[1] = perf_counter_ns()   # Time before SVD
+    if self.incremental_svd is not None:
+      W_b = self.incremental_svd.transform(W_s)  # np.ndarray of shape (m, k_b)
+    else:
+      W_b = custom_svd(W_s, self.k_b, self.svd_backend)  # np.ndarray of shape (m, k_b)
+    times[2] = perf_counter_ns()   # Time before bucketing filter
+    return W_s, W_e, W_b
+
+  def pair_rows(self, pairs):
+    """
+    The normalized windows of the last window for the given pairs. In the
+    incremental mode only the rows that appear in a pair are normalized, from
+    scratch such that the verification doesn't depend on the running sums.
+
+    Returns:
+    tuple: The normalized windows and the pairs as indices into them, like
+    util.normalize_pair_rows.
+    """
+    if self.W is not None:
+      return self.W, pairs
+    return util.normalize_pair_rows(self.w, pairs, self.dtype)
+
+
+def corr_join(t_series, n: int, h: int, T: float, k_s: int, k_e: int, k_b: int,
+  incremental: bool = False, filter_backend: str = "bucketing",
+  alpha_start: int = 0, alpha_stop = None, dtype = np.float64,
+  exact_verification: bool = True, sink = None,
+  svd_backend: str = "exact", verification: str = "norm",
+  memory_budget: int = 2**27, early_abandon: bool = False,
+  abandon_block_size: int = 64):
+  """
+  Run CorrJoin on a collection of time series.
+
+  Parameters:
+  t_series (pandas.DataFrame or np.ndarray): The time series, one per row. A
+  float32 or float64 matrix is used without copying it, see
+  util.as_time_series_matrix.
+  n, h, T, k_s, k_e, k_b: See util.get_params.
+  incremental (bool): Maintain the per-series sums and sums of squares across
+  windows and only update them with the h samples that enter and leave the
+  window, instead of recomputing the mean and the L2 denominator from all n
+  samples. The sums are recomputed from scratch every ceil(n/h) windows, i.e.,
+  once the window has been replaced entirely, to bound the floating point
+  drift. Likewise, the PAA segments of the previous window are reused when h
+  is a multiple of the segment size, see paa.IncrementalPAA. The normalized
+  windows are only computed for the pairs of C_2, see WindowPrefix.pair_rows.
+  filter_backend (str): The candidate generation backend: "bucketing",
+  "kdtree", "parallel_bucketing", "auto" or "incremental_bucketing", see
+  candidate_filter.get_candidate_filter.
+  alpha_start, alpha_stop: The range of windows to process, see
+  util.window_range. Defaults to all windows.
+  dtype: The floating point type of the normalization, PAA, SVD and the
+  filters, np.float64 or np.float32. float32 halves the memory traffic. The
+  running sums of the incremental mode are still accumulated in float64.
+  exact_verification (bool): If dtype is not float64, compute the final
+  distances of the candidates in C_2 from the float64 data, so that pairs
+  close to the threshold are classified like in float64.
+  sink: A result sink from result_sink, e.g. ArraySink or NpyChunkSink, that
+  receives the correlated pairs and their Pearson correlation once per
+  window. The caller closes the sink. Without a sink only the pairs are
+  counted.
+  svd_backend (str): The SVD backend: "exact", "gram" or "randomized", see
+  svd.custom_svd, or "incremental", which updates the basis of the previous
+  window, see svd.IncrementalSVD.
+  verification (str): "norm" computes the distances of the pairs in C_2 from
+  the differences of their windows. "dot" compares the dot products of the
+  unit-norm windows to T instead, computed in blocks that fit into
+  memory_budget bytes, see verification.pair_dot_products.
+  early_abandon (bool): Abandon the distance computation of a pair in the
+  Euclidean distance filter as soon as its partial distance exceeds epsilon_2,
+  see verification.early_abandon_distances. The filter rejects most of C_1,
+  unlike the verification, which keeps computing full distances. The
+  correlated pairs are the same, C_2 may additionally contain pairs within the
+  rounding error of epsilon_2.
+  abandon_block_size (int): The number of coordinates of W per block of the
+  early abandoning. The Euclidean distance filter uses blocks with the same
+  fraction of the k_e coordinates of W_e.
+
+  Returns:
+  tuple: The number of correlated window pairs, the mean overall pruning rate
+  and the mean time of each section in nanoseconds.
+  """
   print('log info: running CorrJoin')
   logger_1 = util.create_logger("corr_join_logger", logging.INFO,
     "report-corr_join.log")
 
   epsilon_1 = sqrt(2*k_s*(1-T)/n)
   epsilon_2 = sqrt(2*k_e*(1-T)/n)
+  if verification not in ("norm", "dot"):
+    raise ValueError(f"Choose verification 'norm' or 'dot'. You chose {verification}")
+  # Convert once, every window is a view of this matrix instead of a copy
+  source = util.as_time_series_matrix(t_series)
+  t_series = source.astype(dtype, copy=False)
   m = t_series.shape[0]   # Number of time series
+  # Verify the candidates on the source data if the filters are less precise
+  verify_exact = exact_verification and t_series.dtype != np.float64
 
   logger_1.info(f"Threshold Theta: {T}")
   num_corr_pairs = 0
   overall_pr = []   # Store overall pruning rate of each iteration
-  len_ts = t_series.shape[1]  # Length of each time series
-  max_alpha = floor((len_ts-n)/h)
-  # Times for profiling, 6 columns/measurements for max_alpha-1 rows/windows
-  p_times = np.empty((max_alpha + 1, 6))
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  ts_windows = util.sliding_windows(t_series, n, h)
+  source_windows = util.sliding_windows(source, n, h)
+  # Times for profiling, 6 columns/measurements per processed window
+  p_times = np.empty((len(windows), 6))
 
-  # Initialize windows
-  w = [None for _ in range(m)]
-  W = [None for _ in range(m)]
-  W_s = np.empty((m, k_s))
-  W_e = np.empty((m, k_e))
+  prefix = WindowPrefix(n, h, k_s, k_e, k_b, incremental, svd_backend, dtype)
+  candidate_filter = get_candidate_filter(filter_backend, k_b, epsilon_1)
 
-  alpha = 0   # Window counter
-  while alpha*h <= (len_ts-n):  # I assume all time series have the same length
+  for row, alpha in enumerate(windows):  # I assume all time series have the same length
     # logger_2.info(f"Window number {alpha}.")
 
-    # Time before shifting the window (0) for window alpha
-    p_times[alpha, 0] = perf_counter_ns()
-
-    # Shift windows
-    # WARNING: Contrary to usual python slices, both the start and the stop are included
-    w = t_series.loc[:, alpha*h:alpha*h+n-1].to_numpy(dtype='float')
-    x_bar = np.mean(w, axis=1)  # np.ndarray of row means, shape (m,)
-    # Normalization
-    # Subtract x_bar from each row using broadcasting
-    w_centered = w - x_bar[:, np.newaxis]
-    # Square element-wise, sum each row, compute square root element-wise
-    denominator = np.sqrt(np.sum(np.power(w_centered, 2), axis=1))  # np.ndarray of shape (m,)
-    W = np.divide(w_centered, denominator[:, np.newaxis]) # np.ndarray of shape (m, n)
-    # PAA
-    W_s = paa_pyts(W, n, k_s)   # np.ndarray of shape (m, k_s)
-    W_e = paa_pyts(W, n, k_e)   # np.ndarray of shape (m, k_e)
-    
-    # SVD
-    p_times[alpha, 1] = perf_counter_ns()   # Time before SVD
-    W_b = custom_svd(W_s, k_b)  # np.ndarray of shape (m, k_b)
+    # Normalization, PAA and SVD, fills the times before shifting the window,
+    # before the SVD and before the bucketing filter
+    W_s, W_e, W_b = prefix.transform(ts_windows[:, alpha], p_times[row])
 
     # Bucketing filter
-    p_times[alpha, 2] = perf_counter_ns()   # Time before bucketing filter
-    C_1, _ = bucketing_filter(W_b, k_b, epsilon_1)
+    C_1, _ = candidate_filter(W_b, k_b, epsilon_1)
 
     # Eucledian distance filter
-    p_times[alpha, 3] = perf_counter_ns()   # Time before Euclidean distance filter
-    # Compute the norms for all pairs
-    distances = np.linalg.norm(W_e[C_1[:, 0]] - W_e[C_1[:, 1]], axis=1)
-    # Create a mask for pairs satisfying the condition
-    correlated_pairs_mask = distances <= epsilon_2
-    # Filter C_1 based on the mask to create C_2
-    C_2 = C_1[correlated_pairs_mask]
+    p_times[row, 3] = perf_counter_ns()   # Time before Euclidean distance filter
+    C_2 = C_1[euclidean_filter(W_e, C_1, epsilon_2, early_abandon,
+      max(1, abandon_block_size*k_e//n))]
     overall_pr.append(1 - C_2.shape[0]/((pow(m, 2)-m)/2))
     # logger_2.info(f"The overall pruning rate is {overall_pruning_rate}.")
     
     # Pearson correlation comparison
-    p_times[alpha, 4] = perf_counter_ns()   # Time before computing the Pearson correlation
-    epsilon = sqrt(2*(1-T))
-    distances = np.linalg.norm(W[C_2[:, 0]] - W[C_2[:, 1]], axis=1)
-    # Check if each distance satisfies the condition
-    correlated_pairs_mask = distances <= epsilon
+    p_times[row, 4] = perf_counter_ns()   # Time before computing the Pearson correlation
+    if verify_exact:
+      W_verify, pairs = util.normalize_pair_rows(source_windows[:, alpha], C_2)
+    else:
+      W_verify, pairs = prefix.pair_rows(C_2)
+    correlated_pairs_mask, corrcoefs = verify_pairs(W_verify, pairs, T,
+      verification, memory_budget)
     correlated_pairs = C_2[correlated_pairs_mask]  # Filter C_2
     num_corr_pairs += correlated_pairs.shape[0]
+    if sink is not None:
+      sink.write(alpha, correlated_pairs, corrcoefs[correlated_pairs_mask])
     # logger_1.info(f"Report ({pair[0]}, {pair[1]}, {alpha}): Window {alpha} of time series {pair[0]} and {pair[1]} are correlated with correlation coefficient {corrcoef}.")
-    p_times[alpha, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
-    
-    if alpha == 99:
-      break
-    alpha += 1
-
-  # Calculate mean differences between consecutive columns
-  section_times = np.round([
-    np.mean(p_times[:, 1] - p_times[:, 0]),
-    np.mean(p_times[:, 2] - p_times[:, 1]),
-    np.mean(p_times[:, 3] - p_times[:, 2]),
-    np.mean(p_times[:, 4] - p_times[:, 3]),
-    np.mean(p_times[:, 5] - p_times[:, 4])
-  ]).astype(int)
+    p_times[row, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
+
+  # Only the rows of the processed windows are filled
+  section_times = util.mean_section_times(p_times)
 
   logger_1.info(f"Report: In total the data contains {num_corr_pairs} correlated window pairs.")
-  return num_corr_pairs, np.mean(overall_pr), section_times
+  return num_corr_pairs, util.mean_pruning_rate(overall_pr), section_times
+
+
+def corr_join_sweep(t_series, n: int, h: int, Ts, k_s: int, k_e: int, k_b: int,
+  incremental: bool = False, filter_backend: str = "bucketing",
+  alpha_start: int = 0, alpha_stop = None, dtype = np.float64,
+  exact_verification: bool = True, sinks = None,
+  svd_backend: str = "exact", verification: str = "norm",
+  memory_budget: int = 2**27, early_abandon: bool = False,
+  abandon_block_size: int = 64):
+  """
+  Run CorrJoin for several thresholds in one pass. Normalization, PAA and SVD
+  don't depend on T, so they run once per window, see WindowPrefix. The
+  candidate filter runs once at the loosest threshold and the distances of
+  each candidate on W_b, W_e and W are computed once. A candidate is in C_1,
+  C_2 and the result of a threshold if its distances are within the epsilons
+  of that threshold, which are the same comparisons corr_join makes. Thus the
+  result for each threshold equals a separate run of corr_join.
+
+  Parameters:
+  t_series (pandas.DataFrame or np.ndarray): The time series, one per row.
+  n, h, k_s, k_e, k_b: See util.get_params.
+  Ts (list of floats): The thresholds T.
+  sinks (list): One result sink or None per threshold, in the order of Ts,
+  see the sink of corr_join.
+  incremental, filter_backend, alpha_start, alpha_stop, dtype,
+  exact_verification, svd_backend, verification, memory_budget,
+  early_abandon, abandon_block_size: See corr_join.
+
+  Returns:
+  tuple: The number of correlated window pairs and the mean overall pruning
+  rate of each threshold as np.ndarrays in the order of Ts, and the mean time
+  of each section in nanoseconds, shared by all thresholds.
+  """
+  print('log info: running CorrJoin sweep')
+  logger_1 = util.create_logger("corr_join_sweep_logger", logging.INFO,
+    "report-corr_join_sweep.log")
+
+  Ts = np.asarray(Ts, dtype=float)
+  # Same formulas as in corr_join, one epsilon per threshold
+  epsilon_1 = np.array([sqrt(2*k_s*(1-T)/n) for T in Ts])
+  epsilon_2 = np.array([sqrt(2*k_e*(1-T)/n) for T in Ts])
+  loosest = np.argmin(Ts)
+  if verification not in ("norm", "dot"):
+    raise ValueError(f"Choose verification 'norm' or 'dot'. You chose {verification}")
+  if sinks is not None and len(sinks) != len(Ts):
+    raise ValueError(f"Expected one sink per threshold, got {len(sinks)} sinks for {len(Ts)} thresholds")
+  # Convert once, every window is a view of this matrix instead of a copy
+  source = util.as_time_series_matrix(t_series)
+  t_series = source.astype(dtype, copy=False)
+  m = t_series.shape[0]   # Number of time series
+  verify_exact = exact_verification and t_series.dtype != np.float64
+
+  logger_1.info(f"Thresholds Theta: {Ts.tolist()}")
+  num_corr_pairs = np.zeros(len(Ts), dtype=int)
+  overall_pr = []   # Store the overall pruning rates of each iteration
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  ts_windows = util.sliding_windows(t_series, n, h)
+  source_windows = util.sliding_windows(source, n, h)
+  # Times for profiling, 6 columns/measurements per processed window
+  p_times = np.empty((len(windows), 6))
+
+  prefix = WindowPrefix(n, h, k_s, k_e, k_b, incremental, svd_backend, dtype)
+  candidate_filter = get_candidate_filter(filter_backend, k_b, epsilon_1[loosest])
+
+  for row, alpha in enumerate(windows):
+    W_s, W_e, W_b = prefix.transform(ts_windows[:, alpha], p_times[row])
+
+    # Bucketing filter at the loosest threshold
+    C_1, _ = candidate_filter(W_b, k_b, epsilon_1[loosest])
+    d_b = np.linalg.norm(W_b[C_1[:, 0]] - W_b[C_1[:, 1]], axis=1)
+
+    # Eucledian distance filter, a column per threshold
+    p_times[row, 3] = perf_counter_ns()   # Time before Euclidean distance filter
+    in_C_2 = (np.less_equal.outer(d_b, epsilon_1) & euclidean_filter(W_e, C_1,
+      epsilon_2, early_abandon, max(1, abandon_block_size*k_e//n)))  # Shape (|C_1|, len(Ts))
+    overall_pr.append(1 - np.sum(in_C_2, axis=0)/((pow(m, 2)-m)/2))
+
+    # Pearson correlation comparison, each candidate of the loosest C_2 once
+    p_times[row, 4] = perf_counter_ns()   # Time before computing the Pearson correlation
+    C_2_mask = in_C_2[:, loosest]
+    C_2, in_C_2 = C_1[C_2_mask], in_C_2[C_2_mask]
+    if verify_exact:
+      W_verify, pairs = util.normalize_pair_rows(source_windows[:, alpha], C_2)
+    else:
+      W_verify, pairs = prefix.pair_rows(C_2)
+    correlated_pairs_mask, corrcoefs = verify_pairs(W_verify, pairs, Ts,
+      verification, memory_budget)
+    # A pair only counts for the thresholds whose filters it passed
+    correlated_pairs_mask &= in_C_2
+    num_corr_pairs += np.sum(correlated_pairs_mask, axis=0)
+    if sinks is not None:
+      for k, sink in enumerate(sinks):
+        if sink is not None:
+          sink.write(alpha, C_2[correlated_pairs_mask[:, k]],
+            corrcoefs[correlated_pairs_mask[:, k]])
+    p_times[row, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
+
+  # Only the rows of the processed windows are filled
+  section_times = util.mean_section_times(p_times)
+
+  logger_1.info(f"Report: The number of correlated window pairs per threshold is {num_corr_pairs.tolist()}.")
+  return num_corr_pairs, util.mean_pruning_rate(np.reshape(overall_pr, (-1, len(Ts)))), section_times
 
 
 # CorrJoin true to the pseudo code by Alizade Nikoo et al.
-def corr_join_unoptimized(t_series, n: int, h: int, T: float, k_s: int, k_e: int, k_b: int):
+def corr_join_unoptimized(t_series, n: int, h: int, T: float, k_s: int, k_e: int, k_b: int,
+  alpha_start: int = 0, alpha_stop = None):
   print('log info: running CorrJoin unoptimized')
   logger_1 = util.create_logger("corr_join_unoptimized_logger", logging.INFO,
     "report-corr_join_unoptimized.log")
 
   epsilon_1 = sqrt(2*k_s*(1-T)/n)
   epsilon_2 = sqrt(2*k_e*(1-T)/n)
+  # Convert once, every window is a view of this matrix instead of a copy
+  t_series = util.as_time_series_matrix(t_series)
   m = t_series.shape[0]   # Number of time series
 
   logger_1.info(f"Threshold Theta: {T}")
   num_corr_pairs = 0
   overall_pr = []   # Store overall pruning rate of each iteration
   join_pr = []  # Store join pruning rate of each iteration
-  len_ts = t_series.shape[1]  # Length of each time series
-  max_alpha = floor((len_ts-n)/h)
-  # Times for profiling, 6 columns/measurements for max_alpha-1 rows/windows
-  p_times = np.empty((max_alpha + 1, 6))
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  ts_windows = util.sliding_windows(t_series, n, h)
+  # Times for profiling, 6 columns/measurements per processed window
+  p_times = np.empty((len(windows), 6))
 
   # Initialize windows
   w = [None for _ in range(m)]
@@ -129,57 +408,45 @@ def corr_join_unoptimized(t_series, n: int, h: int, T: float, k_s: int, k_e: int
   W_s = np.empty((m, k_s))
   W_e = np.empty((m, k_e))
 
-  alpha = 0   # Window counter
-  while alpha*h <= (len_ts-n):  # I assume all time series have the same length
+  for row, alpha in enumerate(windows):  # I assume all time series have the same length
     # Time before shifting the window (0) for window alpha
-    p_times[alpha, 0] = perf_counter_ns()
+    p_times[row, 0] = perf_counter_ns()
     for p in range(m):
-      # WARNING: Contrary to usual python slices, both the start and the stop are included
-      w[p] = t_series.loc[p, alpha*h:alpha*h+n-1].to_numpy(dtype='float')
+      w[p] = ts_windows[p, alpha]
       x_bar = np.mean(w[p])
       W[p] = (w[p] - x_bar) / sqrt(np.sum(pow((w[p]-x_bar), 2)))  # normalization, W[p] is a np.ndarray
       W_s[p] = paa_pyts_unoptimized(W[p], n, k_s)  # PAA
       W_e[p] = paa_pyts_unoptimized(W[p], n, k_e)  # PAA
 
     # SVD
-    p_times[alpha, 1] = perf_counter_ns()   # Time before SVD
+    p_times[row, 1] = perf_counter_ns()   # Time before SVD
     W_b = custom_svd(W_s, k_b)  # np.ndarray of shape (m, k_b)
 
     # Bucketing filter
-    p_times[alpha, 2] = perf_counter_ns()   # Time before bucketing filter
+    p_times[row, 2] = perf_counter_ns()   # Time before bucketing filter
     C_1, pr_1 = bucketing_filter_unoptimized(W_b, k_b, epsilon_1)
     join_pr.append(pr_1)
     C_2 = []
 
     # Eucledian distance filter
-    p_times[alpha, 3] = perf_counter_ns()   # Time before Euclidean distance filter
+    p_times[row, 3] = perf_counter_ns()   # Time before Euclidean distance filter
     for pair in C_1:
       if np.linalg.norm(W_e[pair[0]] - W_e[pair[1]]) <= epsilon_2:
         C_2.append(pair)
     overall_pr.append(1 - len(C_2)/((pow(m, 2)-m)/2))
     
     # Pearson correlation comparison
-    p_times[alpha, 4] = perf_counter_ns()   # Time before computing the Pearson correlation
+    p_times[row, 4] = perf_counter_ns()   # Time before computing the Pearson correlation
     epsilon = sqrt(2*(1-T))
     for pair in C_2:
       if np.linalg.norm(W[pair[0]] - W[pair[1]]) <= epsilon:
         num_corr_pairs += 1
         # logger_1.info(f"Report ({pair[0]}, {pair[1]}, {alpha}): Window {alpha} of time series {pair[0]} and {pair[1]} are correlated with correlation coefficient {np.linalg.norm(W[pair[0]] - W[pair[1]])}.")
-    p_times[alpha, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
-    
-    if alpha == 99:
-      break
-    alpha += 1
-
-  # Calculate mean differences between consecutive columns
-  section_times = np.round([
-    np.mean(p_times[:, 1] - p_times[:, 0]),
-    np.mean(p_times[:, 2] - p_times[:, 1]),
-    np.mean(p_times[:, 3] - p_times[:, 2]),
-    np.mean(p_times[:, 4] - p_times[:, 3]),
-    np.mean(p_times[:, 5] - p_times[:, 4])
-  ]).astype(int)
+    p_times[row, 5] = perf_counter_ns()   # Time after computing the Pearson correlation
+
+  # Only the rows of the processed windows are filled
+  section_times = util.mean_section_times(p_times)
 
   logger_1.info(f"Report: In total the data contains {num_corr_pairs} correlated window pairs.")
-  return num_corr_pairs, np.mean(overall_pr), section_times
+  return num_corr_pairs, util.mean_pruning_rate(overall_pr), section_times
 
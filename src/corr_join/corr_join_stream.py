@@ -0,0 +1,158 @@
+# Standard library imports
+from math import sqrt
+from time import perf_counter_ns
+# Third-party imports
+import numpy as np
+# Local imports
+from candidate_filter import get_candidate_filter
+from corr_join import WindowPrefix, corr_join
+from load_data import load_data
+from result_sink import ArraySink
+from verification import euclidean_filter, verify_pairs
+import util
+
+
+class CorrJoinStream:
+  """
+  Online CorrJoin for time series that arrive as a stream. Push the new
+  samples of all m time series as they arrive and the stream emits the
+  correlated pairs of every window that is completed by them.
+  The stream only keeps a ring buffer with the last n samples of each time
+  series and the incremental state of corr_join.WindowPrefix, so the memory
+  is bounded regardless of the length of the time series. It processes the
+  windows the same way as corr_join.corr_join with incremental = True.
+
+  Parameters:
+  m (int): The number of time series.
+  n, h, T, k_s, k_e, k_b: See util.get_params.
+  filter_backend (str): The candidate generation backend, see
+  candidate_filter.get_candidate_filter.
+  svd_backend (str): The SVD backend, see svd.custom_svd, or "incremental",
+  see svd.IncrementalSVD.
+  sink: A result sink from result_sink that receives the correlated pairs of
+  each window and their Pearson correlation, like the sink of corr_join.
+  The caller closes the sink.
+  """
+
+  def __init__(self, m: int, n: int, h: int, T: float, k_s: int, k_e: int,
+    k_b: int, filter_backend: str = "bucketing", svd_backend: str = "exact",
+    sink = None):
+    self.m, self.n, self.h = m, n, h
+    self.k_s, self.k_e, self.k_b = k_s, k_e, k_b
+    self.filter_backend = filter_backend
+    self.svd_backend = svd_backend
+    self.T = T
+    self.epsilon_1 = sqrt(2*k_s*(1-T)/n)
+    self.epsilon_2 = sqrt(2*k_e*(1-T)/n)
+    self.prefix = WindowPrefix(n, h, k_s, k_e, k_b, incremental=True,
+      svd_backend=svd_backend)
+    self.candidate_filter = get_candidate_filter(filter_backend, k_b, self.epsilon_1)
+    self.sink = sink
+
+    self.buffer = np.empty((m, n))  # Ring buffer with the last n samples
+    self.pos = 0  # Ring buffer position of the next sample
+    self.num_samples = 0  # Number of samples received per time series
+    self.alpha = 0  # Number of the next window
+    self.latencies = []   # Processing time of each window in nanoseconds
+
+  def push(self, samples):
+    """
+    Append new samples to the time series.
+
+    Parameters:
+    samples (np.ndarray): A matrix of shape (m, q) with the next q samples of
+    each time series. Usually q = h.
+
+    Returns:
+    list of tuples: (alpha, correlated_pairs) for each window completed by the
+    samples, where correlated_pairs is an np.ndarray with one pair (i, j),
+    i < j, per row.
+    """
+    samples = np.asarray(samples, dtype='float')
+    if samples.ndim != 2 or samples.shape[0] != self.m:
+      raise ValueError(f"Expected samples of shape ({self.m}, q), got {samples.shape}")
+    results = []
+    start = 0
+    while start < samples.shape[1]:
+      # Write samples up to the end of the next window into the ring buffer
+      next_window_end = self.alpha*self.h + self.n
+      stop = min(samples.shape[1], start + next_window_end - self.num_samples)
+      positions = (self.pos + np.arange(stop - start)) % self.n
+      self.buffer[:, positions] = samples[:, start:stop]
+      self.pos = (self.pos + stop - start) % self.n
+      self.num_samples += stop - start
+      start = stop
+      if self.num_samples == next_window_end:
+        time_start = perf_counter_ns()
+        results.append((self.alpha, self._process_window()))
+        self.latencies.append(perf_counter_ns() - time_start)
+        self.alpha += 1
+    return results
+
+  def _process_window(self):
+    """
+    Run the CorrJoin stages on the window in the ring buffer.
+    """
+    n = self.n
+    # Unroll the ring buffer, the oldest sample is at self.pos
+    w = self.buffer[:, (self.pos + np.arange(n)) % n]
+    W_s, W_e, W_b = self.prefix.transform(w)
+    # Candidate generation
+    C_1, _ = self.candidate_filter(W_b, self.k_b, self.epsilon_1)
+    # Eucledian distance filter
+    C_2 = C_1[euclidean_filter(W_e, C_1, self.epsilon_2)]
+    # Pearson correlation comparison
+    correlated_pairs_mask, corrcoefs = verify_pairs(*self.prefix.pair_rows(C_2), self.T)
+    correlated_pairs = C_2[correlated_pairs_mask]
+    if self.sink is not None:
+      self.sink.write(self.alpha, correlated_pairs, corrcoefs[correlated_pairs_mask])
+    return correlated_pairs
+
+
+def replay(dataset: str, params: str, m: int = -1, max_windows = None):
+  """
+  Feed a dataset through CorrJoinStream h samples at a time and check that the
+  stream finds the same correlated window pairs (i, j, alpha) as the batch
+  corr_join with the default normalization from scratch, with the same
+  correlations.
+
+  Parameters:
+  dataset: The name of the dataset to use.
+  params: The name of the parameter tuple to use.
+  m: The number of time series to include. Defaults to -1, which uses all
+  available time series of the dataset.
+  max_windows: The number of windows to replay. None replays all windows.
+
+  Returns:
+  bool: Whether the stream and the batch results match.
+  """
+  time_series = load_data(dataset, m)
+  n, h, T, k_s, k_e, k_b = util.get_params(params)
+  t_series = time_series.to_numpy(dtype='float')
+
+  stream_sink, batch_sink = ArraySink(), ArraySink()
+  stream = CorrJoinStream(t_series.shape[0], n, h, T, k_s, k_e, k_b,
+    sink=stream_sink)
+  start = 0
+  while start < t_series.shape[1] and (max_windows is None or stream.alpha < max_windows):
+    stream.push(t_series[:, start:start+h])
+    start += h
+
+  corr_join(time_series, n, h, T, k_s, k_e, k_b, alpha_stop=max_windows,
+    sink=batch_sink)
+  stream_pairs, batch_pairs = stream_sink.columns(), batch_sink.columns()
+  print(f"log info: stream: {stream_sink.num_pairs} correlated window pairs in {stream.alpha} windows, median latency {np.median(stream.latencies)/1e6:.3f} ms")
+  print(f"log info: batch: {batch_sink.num_pairs} correlated window pairs")
+  if stream_sink.num_pairs != batch_sink.num_pairs:
+    return False
+  # Compare the pairs as sets, sorted by (alpha, i, j)
+  stream_order = np.lexsort((stream_pairs["j"], stream_pairs["i"], stream_pairs["alpha"]))
+  batch_order = np.lexsort((batch_pairs["j"], batch_pairs["i"], batch_pairs["alpha"]))
+  return (all(np.array_equal(stream_pairs[name][stream_order], batch_pairs[name][batch_order])
+    for name in ("i", "j", "alpha"))
+    and np.allclose(stream_pairs["corr"][stream_order], batch_pairs["corr"][batch_order]))
+
+
+if __name__ == '__main__':
+  for dataset in ("chlorine", "gas", "synthetic"):
+    print(f"log info: {dataset} matches: {replay(dataset, 'm_params', m=200, max_windows=100)}")
@@ -20,4 +20,51 @@ def incp(x, y, n):
   s_4 = np.sum(np.square(y))
   s_5 = np.sum(np.multiply(x, y))
   inc_p = (n*s_5 - s_1*s_3) / sqrt((n*s_2-pow(s_1,2)) * (n*s_4-pow(s_3, 2)))
-  return inc_p
\ No newline at end of file
+  return inc_p
+
+
+def running_sums(w, shift = None):
+  """
+  Compute the per-series statistics s_1 (sum) and s_2 (sum of squares) that
+  incp uses, for every row of a window matrix. The sums are accumulated in
+  float64, also for float32 windows, because they are updated over many
+  windows.
+  With a shift, the sums are those of w - shift. Choose a shift close to the
+  row means, e.g. the means of the window, such that s_2 - s_1^2/n doesn't
+  cancel catastrophically for time series with a large offset.
+
+  Parameters:
+  w (numpy.ndarray): A matrix of shape (m, n) with one window per row.
+  shift (numpy.ndarray): The value subtracted from each row, shape (m,).
+
+  Return:
+  tuple: s_1 and s_2, both np.ndarrays of shape (m,).
+  """
+  if shift is not None:
+    w = w - shift[:, np.newaxis]
+  return np.sum(w, axis=1, dtype=np.float64), np.sum(np.square(w), axis=1, dtype=np.float64)
+
+
+def update_running_sums(s_1, s_2, leaving, entering, shift = None):
+  """
+  Slide s_1 and s_2 from running_sums by one stride: subtract the samples that
+  leave the window and add the samples that enter it. The cost scales with the
+  stride h instead of the window size n.
+
+  Parameters:
+  s_1 (numpy.ndarray): Per-series sums of the previous window, shape (m,).
+  s_2 (numpy.ndarray): Per-series sums of squares of the previous window.
+  leaving (numpy.ndarray): The first h samples of the previous window, shape (m, h).
+  entering (numpy.ndarray): The last h samples of the new window, shape (m, h).
+  shift (numpy.ndarray): The shift of running_sums, shape (m,).
+
+  Return:
+  tuple: The updated s_1 and s_2.
+  """
+  if shift is not None:
+    leaving = leaving - shift[:, np.newaxis]
+    entering = entering - shift[:, np.newaxis]
+  s_1 = s_1 - np.sum(leaving, axis=1, dtype=np.float64) + np.sum(entering, axis=1, dtype=np.float64)
+  s_2 = (s_2 - np.sum(np.square(leaving), axis=1, dtype=np.float64)
+    + np.sum(np.square(entering), axis=1, dtype=np.float64))
+  return s_1, s_2
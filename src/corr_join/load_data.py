@@ -1,8 +1,10 @@
 # Standard library imports
+import json
 import os
 # Third-party imports
 import librosa
 import numpy as np
+from numpy.lib.format import open_memmap
 import pandas as pd
 # Local imports
 
@@ -123,30 +125,246 @@ def automated_financial(_, m: int):
   return time_series
 
 
-def gdrive(dataset: str, m: int = -1):
+def gdrive_cache(dataset: str):
+  """
+  Load the time series matrix of one of the gdrive datasets through a binary
+  cache. On the first load, the text file is parsed and stored next to it as
+  a row-major float64 .npy file with a small JSON sidecar, which records the
+  modification time and the size of the text file. Later loads memory-map the
+  .npy file instead of parsing the text file. The cache is rebuilt when the
+  text file changes.
+
+  Parameters:
+  dataset: One of chlorine, gas, random, stock, synthetic.
+
+  Returns:
+  np.memmap: A read-only matrix with one time series per row.
+  """
+  source_path = f"./data/google-drive/{dataset}.txt"
+  cache_path = f"./data/google-drive/{dataset}.npy"
+  meta_path = f"./data/google-drive/{dataset}.meta.json"
+  source_stat = os.stat(source_path)
+  source_meta = {"mtime_ns": source_stat.st_mtime_ns, "size": source_stat.st_size}
+
+  if os.path.exists(cache_path) and os.path.exists(meta_path):
+    with open(meta_path, encoding='utf-8') as meta_file:
+      meta = json.load(meta_file)
+    if meta.get("source") == source_meta:
+      return np.load(cache_path, mmap_mode='r')
+
+  print(f"log info: building cache for {dataset} data")
+  # Use raw string to suppress unnecessary warning.
+  df = pd.read_csv(source_path, sep=r'\s+', header=None)
+  data = np.ascontiguousarray(df.to_numpy(dtype=np.float64).T)  # The data is stored in column major
+  # Write to temporary files first, such that an interrupted write never
+  # leaves a cache that looks valid
+  np.save(f"{cache_path}.tmp.npy", data)
+  os.replace(f"{cache_path}.tmp.npy", cache_path)
+  with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as meta_file:
+    json.dump({"source": source_meta, "shape": data.shape, "dtype": data.dtype.str},
+      meta_file)
+  os.replace(f"{meta_path}.tmp", meta_path)
+  return np.load(cache_path, mmap_mode='r')
+
+
+def gdrive(dataset: str, m: int = -1, dtype = None):
   """
   Load one of the given datasets: chlorine, gas, random, stock, synthetic.
 
   Parameters:
   dataset: Choose one of the above datasets.
   m: Number of time series to return.
+  dtype: Convert the data to this floating point type, e.g. np.float32.
+  Defaults to the float64 of the cache.
+
+  Returns:
+  pandas.DataFrame: The first m time series, one per row. Without a dtype
+  conversion the DataFrame is backed by the memory-mapped cache, see
+  gdrive_cache.
   """
   print(f"log info: loading {dataset} data")
-  # Use raw string to suppress unnecessary warning.
-  df = pd.read_csv(f"./data/google-drive/{dataset}.txt", sep=r'\s+', header=None)
-  df = df.T   # The data is stored in column major
-  m = df.shape[0] if (m == -1) else min(m, df.shape[0])
-  return df.head(m)
+  data = gdrive_cache(dataset)
+  m = data.shape[0] if (m == -1) else min(m, data.shape[0])
+  # Slicing the rows of the memory map doesn't copy the data
+  data = data[:m]
+  if dtype is not None:
+    data = data.astype(dtype, copy=False)
+  return pd.DataFrame(data, copy=False)
+
+
+def latent_increments(L: int, clusters: int, seed: int):
+  """
+  The increments of the latent random walk of each cluster, shape (clusters, L).
+  """
+  return np.random.default_rng([seed, 0]).standard_normal((clusters, L))
+
+
+def series_assignment(rng, num_regimes: int, clusters: int,
+  switch_probability: float):
+  """
+  Draw the cluster of a series in each regime. The first regime picks a
+  random cluster, every later regime picks a new random cluster with
+  probability switch_probability and keeps the cluster otherwise.
+  """
+  assignment = rng.integers(0, clusters, num_regimes)
+  switches = rng.random(num_regimes) < switch_probability
+  switches[0] = True
+  # Each regime keeps the cluster of the last regime that switched
+  last_switch = np.maximum.accumulate(np.where(switches, np.arange(num_regimes), 0))
+  return assignment[last_switch]
+
+
+def synthetic_correlated(m: int, L: int, clusters: int = 10, noise: float = 1.0,
+  regime_length = None, switch_probability: float = 0.2, seed: int = 0,
+  path = None, chunk_size: int = 256, dtype = np.float64):
+  """
+  Generate m time series of length L with planted correlations. Each cluster
+  has a latent random walk. In each regime of regime_length samples, a series
+  follows the increments of the latent walk of its cluster, so its path stays
+  continuous when it changes the cluster at a regime boundary. Each series
+  adds white noise with standard deviation noise and has its own scale and
+  offset, which don't change its correlations.
+  Two series that stay in the same cluster during a window are correlated
+  with about var/(var + noise^2), where var is the variance of the latent walk
+  in the window, about n/6 for windows of n samples. Series of different
+  clusters are uncorrelated in expectation. See window_labels for the planted
+  pairs of a window.
+  Every series has its own random generator seeded by (seed, index), so the
+  data doesn't depend on chunk_size and the first m' < m series equal the data
+  generated for m'.
+
+  Parameters:
+  m (int): The number of time series.
+  L (int): The length of each time series.
+  clusters (int): The number of latent random walks.
+  noise (float): The standard deviation of the white noise of each series,
+  relative to the standard deviation 1 of the latent increments.
+  regime_length (int): The number of samples per regime, defaults to L, i.e.,
+  no regime changes.
+  switch_probability (float): The probability that a series changes its
+  cluster at a regime boundary.
+  seed (int): The seed of the data.
+  path (str): Write the data to this .npy file with np.lib.format.open_memmap
+  instead of keeping it in memory, so only chunk_size series are in memory at
+  once.
+  chunk_size (int): The number of series generated at once.
+  dtype: The floating point type of the data.
+
+  Returns:
+  tuple: The data of shape (m, L), a np.memmap if path is given, and the
+  cluster of each series in each regime, shape (m, number of regimes).
+  """
+  regime_length = L if regime_length is None else regime_length
+  num_regimes = -(-L // regime_length)
+  increments = latent_increments(L, clusters, seed)
+  if path is None:
+    data = np.empty((m, L), dtype=dtype)
+  else:
+    data = open_memmap(path, mode='w+', dtype=dtype, shape=(m, L))
+  assignments = np.empty((m, num_regimes), dtype=np.int32)
+  regime_of_t = np.arange(L) // regime_length
+  chunk = np.empty((min(chunk_size, m), L))
+  for lo in range(0, m, chunk_size):
+    hi = min(lo + chunk_size, m)
+    for i in range(lo, hi):
+      rng = np.random.default_rng([seed, 1, i])
+      assignments[i] = series_assignment(rng, num_regimes, clusters,
+        switch_probability)
+      scale, offset = rng.uniform(0.5, 2), rng.uniform(-50, 50)
+      path_i = np.cumsum(increments[assignments[i][regime_of_t], np.arange(L)])
+      chunk[i-lo] = scale*(path_i + noise*rng.standard_normal(L)) + offset
+    data[lo:hi] = chunk[:hi-lo]
+  if path is not None:
+    data.flush()
+  return data, assignments
+
+
+def window_labels(assignments, n: int, h: int, regime_length: int, alpha: int):
+  """
+  The planted clusters of window alpha of synthetic_correlated data. The
+  planted correlated pairs of the window are the pairs of series with the
+  same label, see planted_pairs.
+
+  Parameters:
+  assignments (np.ndarray): The cluster of each series in each regime.
+  n, h: See util.get_params.
+  regime_length (int): The regime_length of the data, L without regime changes.
+  alpha (int): The window number.
+
+  Returns:
+  np.ndarray: The cluster of each series, or -1 if the series changes its
+  cluster within the window, shape (m,).
+  """
+  first = (alpha*h) // regime_length
+  last = (alpha*h + n - 1) // regime_length
+  regimes = assignments[:, first:last + 1]
+  return np.where(np.all(regimes == regimes[:, :1], axis=1), regimes[:, 0], -1)
 
 
-def load_data(name: str, m: int = -1):
+def planted_pairs(labels):
+  """
+  Returns:
+  np.ndarray: The planted pairs (i, j), i < j, of series with the same label
+  of window_labels, one per row. The number of pairs grows quadratically
+  with the cluster sizes, use planted_recall for large m.
+  """
+  same = (labels[:, np.newaxis] == labels[np.newaxis, :]) & (labels >= 0)[:, np.newaxis]
+  return np.argwhere(np.triu(same, k=1))
+
+
+def planted_recall(labels, pairs):
+  """
+  The fraction of the planted pairs of a window that are in pairs, without
+  listing the planted pairs.
+
+  Parameters:
+  labels (np.ndarray): See window_labels.
+  pairs (np.ndarray): Distinct pairs (i, j), e.g. the correlated pairs that
+  CorrJoin found in the window.
+  """
+  counts = np.bincount(labels[labels >= 0])
+  num_planted = np.sum(counts*(counts - 1)//2)
+  if num_planted == 0:
+    return 1.0
+  found = (labels[pairs[:, 0]] == labels[pairs[:, 1]]) & (labels[pairs[:, 0]] >= 0)
+  return np.sum(found)/num_planted
+
+
+def synthetic_correlated_data(dataset: str, m: int, L: int = 10000, seed: int = 0):
+  """
+  Load synthetic_correlated data with the default structure through a cache
+  in ./data/synthetic/, so large m are generated once.
+
+  Parameters:
+  m (int): Number of time series, defaults to 1000 for m = -1.
+
+  Returns:
+  np.memmap: A read-only matrix with one time series per row.
+  """
+  m = 1000 if m == -1 else m
+  os.makedirs("./data/synthetic", exist_ok=True)
+  cache_path = f"./data/synthetic/{dataset}-{m}x{L}-seed{seed}.npy"
+  if not os.path.exists(cache_path):
+    print(f"log info: generating {dataset} data")
+    # Write to a temporary file first, such that an interrupted write never
+    # leaves a cache that looks valid
+    synthetic_correlated(m, L, regime_length=L//4, seed=seed,
+      path=f"{cache_path}.tmp.npy")
+    os.replace(f"{cache_path}.tmp.npy", cache_path)
+  return np.load(cache_path, mmap_mode='r')
+
+
+def load_data(name: str, m: int = -1, dtype = None):
   """
   Load one of the given datasets: chlorine, gas, random, stock, synthetic,
-  audio, custom_financial, automated_financial.
+  audio, custom_financial, automated_financial, synthetic_correlated.
 
   Parameters:
   name: Name of a given dataset.
   m: Number of time series to return.
+  dtype: Convert the time series to this floating point type, e.g.
+  np.float32 for corr_join with dtype = np.float32. Defaults to the type of
+  the dataset, the audio datasets are float32, the others float64.
   """
   datasets = {
     "chlorine": gdrive,
@@ -159,8 +377,19 @@ def load_data(name: str, m: int = -1):
     "audio_drums_8k": audio,
     "custom_financial": custom_financial,
     "automated_financial": automated_financial,
+    "synthetic_correlated": synthetic_correlated_data,
   }
-  return datasets[name](name, m)
+  if datasets[name] is gdrive:
+    return gdrive(name, m, dtype)
+  if datasets[name] is synthetic_correlated_data:
+    data = synthetic_correlated_data(name, m)
+    if dtype is not None:
+      data = data.astype(dtype, copy=False)
+    return pd.DataFrame(data, copy=False)
+  time_series = datasets[name](name, m)
+  if dtype is not None:
+    time_series = [ts.astype(dtype, copy=False) for ts in time_series]
+  return time_series
 
 
 # Functions for testing and debugging
@@ -2,16 +2,81 @@
 import logging
 from time import perf_counter_ns
 # Third-party imports
+import numpy as np
 # Local imports
+from brute_force_blocked import brute_force_blocked
 from brute_force_euc_dist import brute_force_euc_dist
 from brute_force_p_corr import brute_force_p_corr
-from corr_join import corr_join, corr_join_unoptimized
+from corr_join import corr_join, corr_join_sweep, corr_join_unoptimized
 from load_data import load_data
 import util
 
 
+def algorithm_label(algorithm_1, options):
+  """
+  Name a run in the algorithm column of the performance log, e.g.
+  "corr_join+svd_backend=gram" for corr_join with options svd_backend="gram".
+  Without options the label is the name of the function. The column isn't
+  quoted, so only scalar options are allowed, and types like np.float32 are
+  named by their name.
+
+  Raises:
+  ValueError: If an option is not a scalar or its text contains one of the
+  separators , + = " or a line break.
+  """
+  parts = [algorithm_1.__name__]
+  for key, value in options.items():
+    if isinstance(value, type):
+      value = value.__name__
+    if not (value is None or isinstance(value, (str, int, float, np.generic))):
+      raise ValueError(f"The option {key} is not a scalar and can't be part of the label")
+    part = f"{key}={value}"
+    if any(separator in part for separator in (",", "+", '"', "\n", "\r")) or part.count("=") > 1:
+      raise ValueError(f"The option {part} contains a separator of the performance log")
+    parts.append(part)
+  return "+".join(parts)
+
+
+def performance_row(dataset: str, m: int, params, label: str, pruning_rate,
+  num_corr_pairs, time_elapsed, profiling_times):
+  """
+  Format a row of the performance log, see util.create_csv_logger.
+
+  Parameters:
+  params (tuple): n, h, T, k_s, k_e, k_b.
+  label (str): The algorithm column, see algorithm_label.
+  time_elapsed (int): The runtime in nanoseconds.
+  profiling_times: The mean time of each section in nanoseconds.
+  """
+  n, h, T, k_s, k_e, k_b = params
+  return f"{dataset},{m},{n},{h},{T},{k_s},{k_e},{k_b},{label},{round(pruning_rate, 3)},{num_corr_pairs},{round(time_elapsed/1e9, 3)}, {profiling_times[0]}, {profiling_times[1]}, {profiling_times[2]}, {profiling_times[3]}, {profiling_times[4]}"
+
+
+class RowBuffer:
+  """
+  Collect the rows of the performance log of a run, such that they can be
+  logged together with the wall-clock time of the run, see log_run.
+  """
+
+  def __init__(self):
+    self.rows = []
+
+  def info(self, row):
+    self.rows.append(row)
+
+
+def log_run(logger, rows, wall_time):
+  """
+  Log the rows of a run with the wall-clock time of the whole run in seconds
+  as last column, see util.create_csv_logger.
+  """
+  for row in rows:
+    logger.info(f"{row},{round(wall_time, 3)}")
+
+
 def corr_join_wrapper(dataset: str, params: str, logger,
-  algorithm_1 = corr_join, m: int = -1):
+  algorithm_1 = corr_join, m: int = -1, alpha_start: int = 0,
+  alpha_stop = 100, **options):
   """
   Load the specified data and run CorrJoin with the given parameters.
 
@@ -22,21 +87,28 @@ def corr_join_wrapper(dataset: str, params: str, logger,
   algorithm_1: The correlation function to use.
   m: The number of time series to include. Defaults to -1, which uses all
   available time series of the dataset.
+  alpha_start, alpha_stop: The range of windows to process, see
+  util.window_range. Defaults to the first 100 windows, the sample used for
+  the experiments. Pass alpha_stop = "all" to process all windows.
+  options: Further keyword arguments for algorithm_1, e.g. svd_backend for
+  corr_join. They are part of the algorithm column, see algorithm_label.
   """
   time_series = load_data(dataset, m)
   n, h, T, k_s, k_e, k_b = util.get_params(params)
 
   time_start = perf_counter_ns()
-  num_corr_pairs, pruning_rate, profiling_times = algorithm_1(time_series, n, h, T, k_s, k_e, k_b)
+  num_corr_pairs, pruning_rate, profiling_times = algorithm_1(time_series, n, h, T, k_s, k_e, k_b,
+    alpha_start=alpha_start, alpha_stop=alpha_stop, **options)
   time_elapsed = perf_counter_ns()-time_start
 
-  logger.info(
-    f"{dataset},{time_series.shape[0]},{n},{h},{T},{k_s},{k_e},{k_b},{algorithm_1.__name__},{round(pruning_rate, 3)},{num_corr_pairs},{round(time_elapsed/1e9, 3)}, {profiling_times[0]}, {profiling_times[1]}, {profiling_times[2]}, {profiling_times[3]}, {profiling_times[4]}"
-  )
+  logger.info(performance_row(dataset, time_series.shape[0],
+    (n, h, T, k_s, k_e, k_b), algorithm_label(algorithm_1, options),
+    pruning_rate, num_corr_pairs, time_elapsed, profiling_times))
 
 
 def corr_join_wrapper_loop(time_series, dataset_name: str, params: str, logger,
-  algorithm_1 = corr_join):
+  algorithm_1 = corr_join, alpha_start: int = 0, alpha_stop = 100,
+  **options):
   """
   Run CorrJoin with the given parameters. 
 
@@ -46,16 +118,147 @@ def corr_join_wrapper_loop(time_series, dataset_name: str, params: str, logger,
   params: The name of the parameter tuple to use.
   logger (Logger): Logger for logging performance metrics of the run.
   algorithm_1: The correlation function to use.
+  alpha_start, alpha_stop, options: See corr_join_wrapper.
   """
   n, h, T, k_s, k_e, k_b = util.get_params(params)
 
   time_start = perf_counter_ns()
-  num_corr_pairs, pruning_rate, profiling_times = algorithm_1(time_series, n, h, T, k_s, k_e, k_b)
+  num_corr_pairs, pruning_rate, profiling_times = algorithm_1(time_series, n, h, T, k_s, k_e, k_b,
+    alpha_start=alpha_start, alpha_stop=alpha_stop, **options)
+  time_elapsed = perf_counter_ns()-time_start
+
+  logger.info(performance_row(dataset_name, time_series.shape[0],
+    (n, h, T, k_s, k_e, k_b), algorithm_label(algorithm_1, options),
+    pruning_rate, num_corr_pairs, time_elapsed, profiling_times))
+
+
+def corr_join_sweep_wrapper(time_series, dataset_name: str, params_list, logger,
+  alpha_start: int = 0, alpha_stop = 100, **options):
+  """
+  Run CorrJoin for the thresholds of several parameter tuples in one pass,
+  see corr_join.corr_join_sweep. Each threshold gets a row with its pruning
+  rate and number of correlated window pairs but a NaN runtime, and the
+  shared runtime is logged once in a row with the label suffix
+  "+all_thresholds" and NaN for T, the pruning rate and the number of pairs.
+
+  Parameters:
+  time_series (pandas.DataFrame): The dataset of time series.
+  dataset_name: The name of the dataset to use.
+  params_list: The names of the parameter tuples. They may only differ in T.
+  logger (Logger): Logger for logging performance metrics of the run.
+  alpha_start, alpha_stop, options: See corr_join_wrapper.
+  """
+  params = [util.get_params(name) for name in params_list]
+  n, h, _, k_s, k_e, k_b = params[0]
+  if any((p[0], p[1], p[3], p[4], p[5]) != (n, h, k_s, k_e, k_b) for p in params):
+    raise ValueError(f"The parameter tuples {params_list} differ in more than T")
+  Ts = [p[2] for p in params]
+
+  time_start = perf_counter_ns()
+  num_corr_pairs, pruning_rates, profiling_times = corr_join_sweep(time_series,
+    n, h, Ts, k_s, k_e, k_b, alpha_start=alpha_start, alpha_stop=alpha_stop,
+    **options)
   time_elapsed = perf_counter_ns()-time_start
 
-  logger.info(
-    f"{dataset_name},{time_series.shape[0]},{n},{h},{T},{k_s},{k_e},{k_b},{algorithm_1.__name__},{round(pruning_rate, 3)},{num_corr_pairs},{round(time_elapsed/1e9, 3)}, {profiling_times[0]}, {profiling_times[1]}, {profiling_times[2]}, {profiling_times[3]}, {profiling_times[4]}"
-  )
+  label = algorithm_label(corr_join_sweep, options)
+  m = time_series.shape[0]
+  for T, num_corr_pairs_T, pruning_rate in zip(Ts, num_corr_pairs, pruning_rates):
+    logger.info(performance_row(dataset_name, m, (n, h, T, k_s, k_e, k_b),
+      label, pruning_rate, num_corr_pairs_T, np.nan, np.full(5, np.nan)))
+  logger.info(performance_row(dataset_name, m, (n, h, np.nan, k_s, k_e, k_b),
+    f"{label}+all_thresholds", np.nan, np.nan, time_elapsed, profiling_times))
+
+
+# The algorithms of the experiments by name
+algorithms = {
+  "corr_join": corr_join,
+  "corr_join_unoptimized": corr_join_unoptimized,
+  "corr_join_sweep": corr_join_sweep,
+  "brute_force_euc_dist": brute_force_euc_dist,
+  "brute_force_p_corr": brute_force_p_corr,
+  "brute_force_blocked": brute_force_blocked,
+}
+
+# The runs of each gen_* function, see run_experiment. scheduler.py runs the
+# runs of all entries in parallel. Each entry lists "datasets", "m" values,
+# "params" names of util.get_params and "algorithms" names of the algorithms
+# dict, and optionally "options" passed to each algorithm. corr_join_sweep
+# takes a tuple of parameter names, see corr_join_sweep_wrapper.
+experiments = {
+  "gen_t_runtime_pr_data": [
+    {"datasets": ["synthetic", "chlorine", "gas"], "m": [200],
+      "params": [f"t_runtime_pr_run_{i}" for i in range(7)],
+      "algorithms": ["corr_join", "brute_force_euc_dist", "corr_join_unoptimized"]},
+    {"datasets": ["synthetic", "chlorine", "gas"], "m": [200],
+      "params": [tuple(f"t_runtime_pr_run_{i}" for i in range(7))],
+      "algorithms": ["corr_join_sweep"]},
+  ],
+  "gen_n_runtime_pr_data": [
+    {"datasets": ["synthetic"], "m": [200],
+      "params": [f"n_runtime_pr_run_{i}" for i in range(4)],
+      "algorithms": ["corr_join", "brute_force_euc_dist", "corr_join_unoptimized"]},
+  ],
+  "gen_h_runtime": [
+    {"datasets": ["synthetic"], "m": [200],
+      "params": [f"h_runtime_run_{i}" for i in range(5)],
+      "algorithms": ["corr_join", "brute_force_euc_dist", "corr_join_unoptimized"]},
+  ],
+  "gen_m_runtime": [
+    {"datasets": ["synthetic"], "m": util.get_params("m_vals"), "params": ["m_params"],
+      "algorithms": ["corr_join", "brute_force_euc_dist", "brute_force_blocked",
+        "corr_join_unoptimized"]},
+    {"datasets": ["synthetic"], "m": util.get_params("m_vals"), "params": ["m_params"],
+      "algorithms": ["corr_join"], "options": {"svd_backend": "gram"}},
+  ],
+}
+
+
+def run_algorithm(time_series, dataset_name: str, params, algorithm: str,
+  logger, **options):
+  """
+  Run an algorithm of the algorithms dict on a dataset and log its rows.
+
+  Parameters:
+  time_series (pandas.DataFrame): The dataset of time series.
+  dataset_name: The name of the dataset.
+  params: The name of the parameter tuple, a tuple of names for
+  corr_join_sweep.
+  algorithm (str): The name of the algorithm.
+  logger (Logger): Logger for logging performance metrics of the run.
+  options: See corr_join_wrapper.
+  """
+  if algorithm == "corr_join_sweep":
+    corr_join_sweep_wrapper(time_series, dataset_name, params, logger, **options)
+  else:
+    corr_join_wrapper_loop(time_series, dataset_name, params, logger,
+      algorithm_1=algorithms[algorithm], **options)
+
+
+def run_experiment(name: str, perf_logger, datasets = None, m_values = None):
+  """
+  Run the entries of experiments[name] one run after another. Each dataset
+  is loaded once per m value. The rows of each run get its wall-clock time,
+  see log_run.
+
+  Parameters:
+  name (str): The name of the gen_* function.
+  perf_logger (Logger): Logger for logging performance metrics of the runs.
+  datasets, m_values (list): Replace the datasets and the m values of the
+  entries.
+  """
+  for entry in experiments[name]:
+    for dataset in datasets or entry["datasets"]:
+      print(f"log info: dataset: {dataset}")
+      for m in m_values or entry["m"]:
+        print(f"log info: m: {m}")
+        df = load_data(dataset, m=m)
+        for params in entry["params"]:
+          for algorithm in entry["algorithms"]:
+            wall_start = perf_counter_ns()
+            rows = RowBuffer()
+            run_algorithm(df, dataset, params, algorithm, rows,
+              **entry.get("options", {}))
+            log_run(perf_logger, rows.rows, (perf_counter_ns()-wall_start)/1e9)
 
 
 def gen_t_runtime_pr_data(dataset: str, m, perf_logger):
@@ -63,12 +266,7 @@ def gen_t_runtime_pr_data(dataset: str, m, perf_logger):
   Generate performance data for the runtime vs. T and pruning rate vs. T
   plots.
   """
-  print(f"log info: dataset: {dataset}")
-  df = load_data(dataset, m=m)
-  for i in range(7):
-    corr_join_wrapper_loop(df, dataset, f"t_runtime_pr_run_{i}", perf_logger)
-    corr_join_wrapper_loop(df, dataset, f"t_runtime_pr_run_{i}", perf_logger, algorithm_1=brute_force_euc_dist)
-    corr_join_wrapper_loop(df, dataset, f"t_runtime_pr_run_{i}", perf_logger, algorithm_1=corr_join_unoptimized)
+  run_experiment("gen_t_runtime_pr_data", perf_logger, [dataset], [m])
 
 
 def gen_n_runtime_pr_data(dataset: str, m, perf_logger):
@@ -76,36 +274,21 @@ def gen_n_runtime_pr_data(dataset: str, m, perf_logger):
   Generate performance data for the runtime vs. n and pruning rate vs. n
   plots.
   """
-  print(f"log info: dataset: {dataset}")
-  df = load_data(dataset, m=m)
-  for i in range(4):
-    corr_join_wrapper_loop(df, dataset, f"n_runtime_pr_run_{i}", perf_logger)
-    corr_join_wrapper_loop(df, dataset, f"n_runtime_pr_run_{i}", perf_logger, algorithm_1=brute_force_euc_dist)
-    corr_join_wrapper_loop(df, dataset, f"n_runtime_pr_run_{i}", perf_logger, algorithm_1=corr_join_unoptimized)
+  run_experiment("gen_n_runtime_pr_data", perf_logger, [dataset], [m])
 
 
 def gen_h_runtime(dataset: str, m, perf_logger):
   """
   Generate performance data for the runtime vs. h plots.
   """
-  print(f"log info: dataset: {dataset}")
-  df = load_data(dataset, m=m)
-  for i in range(5):
-    corr_join_wrapper_loop(df, dataset, f"h_runtime_run_{i}", perf_logger)
-    corr_join_wrapper_loop(df, dataset, f"h_runtime_run_{i}", perf_logger, algorithm_1=brute_force_euc_dist)
-    corr_join_wrapper_loop(df, dataset, f"h_runtime_run_{i}", perf_logger, algorithm_1=corr_join_unoptimized)
+  run_experiment("gen_h_runtime", perf_logger, [dataset], [m])
 
 
 def gen_m_runtime(dataset: str, perf_logger):
   """
   Generate performance data for the runtime vs. n plots.
   """
-  for m in util.get_params("m_vals"):
-    print(f"log info: m: {m}")
-    df = load_data(dataset, m=m)
-    corr_join_wrapper_loop(df, dataset, f"m_params", perf_logger)
-    corr_join_wrapper_loop(df, dataset, f"m_params", perf_logger, algorithm_1=brute_force_euc_dist)
-    corr_join_wrapper_loop(df, dataset, f"m_params", perf_logger, algorithm_1=corr_join_unoptimized)
+  run_experiment("gen_m_runtime", perf_logger, [dataset])
 
 
 def gen_all(perf_logger):
@@ -24,6 +24,134 @@ def paa_pyts(time_series, n: int, k: int):
   return transformer.transform(time_series)
 
 
+def paa_reshape(time_series, n: int, k: int):
+  """
+  Perform PAA on a collection of time series with a single reshape and mean,
+  without constructing a pyts transformer. The result equals paa_pyts.
+
+  Parameters:
+  time_series (np.ndarray): A matrix with time series of length n.
+  n (int): The length of the time series.
+  k (int): The number of dimensions for the reduced representation. Choose k such that k < n and k divides n.
+
+  Returns:
+  np.ndarray: A matrix with time series of length k.
+  """
+  if n%k != 0 or not k < n:
+    raise ValueError(f"Choose k such that k < n and k divides n. You chose n = {n} and k = {k}")
+  return time_series.reshape(time_series.shape[0], k, n//k).mean(axis=2)
+
+
+def coarsen_paa(time_series, k_fine: int, k_coarse: int):
+  """
+  Derive a coarser PAA from a finer one by averaging k_fine/k_coarse
+  consecutive segments. This is exact, because all segments have the same
+  size.
+
+  Parameters:
+  time_series (np.ndarray): A matrix with PAA representations of length k_fine.
+  k_fine (int): The number of dimensions of time_series.
+  k_coarse (int): The number of dimensions of the result, must divide k_fine.
+
+  Returns:
+  np.ndarray: A matrix with time series of length k_coarse.
+  """
+  if k_fine%k_coarse != 0:
+    raise ValueError(f"k_s must divide k_e to derive W_s from W_e. You chose k_s = {k_coarse} and k_e = {k_fine}")
+  return time_series.reshape(time_series.shape[0], k_coarse, k_fine//k_coarse).mean(axis=2)
+
+
+def paa_multi_resolution(time_series, n: int, k_s: int, k_e: int):
+  """
+  Compute W_s and W_e in one pass over the time series. The finer resolution
+  k_e is computed from time_series, the coarser resolution k_s is derived from
+  it by re-aggregation. Use two calls of paa_reshape if k_s does not divide
+  k_e.
+
+  Parameters:
+  time_series (np.ndarray): A matrix with time series of length n.
+  n (int): The length of the time series.
+  k_s (int): The number of dimensions of W_s, must divide k_e.
+  k_e (int): The number of dimensions of W_e, must divide n.
+
+  Returns:
+  tuple: W_s (np.ndarray of shape (m, k_s)) and W_e (np.ndarray of shape (m, k_e)).
+  """
+  if k_e%k_s != 0:
+    raise ValueError(f"k_s must divide k_e for multi-resolution PAA. You chose k_s = {k_s} and k_e = {k_e}")
+  W_e = paa_reshape(time_series, n, k_e)
+  return coarsen_paa(W_e, k_e, k_s), W_e
+
+
+class IncrementalPAA:
+  """
+  PAA of consecutive sliding windows that reuses the segments of the previous
+  window. The engine keeps the raw (unnormalized) segment sums of the current
+  window in a ring buffer. If the stride h is a multiple of the segment size
+  n/k, shifting the window drops h/(n/k) segments at the front and appends as
+  many new segments at the back, so only the new segments are summed. The
+  normalization is affine, thus it is applied to the segment means afterwards:
+  PAA((w - x_bar)/d) = (PAA(w) - x_bar)/d.
+  For strides that don't line up with the segments, every window is reduced
+  from scratch.
+
+  Parameters:
+  n (int): The window size.
+  k (int): The number of dimensions for the reduced representation. Choose k
+  such that k < n and k divides n.
+  h (int): The stride between consecutive windows.
+  """
+
+  def __init__(self, n: int, k: int, h: int):
+    if n%k != 0 or not k < n:
+      raise ValueError(f"Choose k such that k < n and k divides n. You chose n = {n} and k = {k}")
+    self.n = n
+    self.k = k
+    self.seg_size = n//k
+    # Number of segments that leave and enter the window per stride, None if
+    # the stride doesn't line up with the segments
+    self.seg_shift = h//self.seg_size if (h%self.seg_size == 0 and h < n) else None
+    self.reset()
+
+  def reset(self):
+    """
+    Forget the previous window, the next call reduces its window from scratch.
+    """
+    self.seg_sums = None  # Ring buffer of raw segment sums, shape (m, k)
+    self.head = 0   # Ring buffer position of the first segment of the window
+
+  def transform(self, w, x_bar, denominator):
+    """
+    Compute the PAA of the normalized window (w - x_bar)/denominator. Call
+    this once per window, in window order.
+
+    Parameters:
+    w (np.ndarray): The raw window, a matrix of shape (m, n).
+    x_bar (np.ndarray): The row means of w, shape (m,).
+    denominator (np.ndarray): The L2 norms of the centered rows of w, shape (m,).
+
+    Returns:
+    np.ndarray: A matrix with time series of length k, of the same type as w.
+    The segment sums are kept in float64 across windows.
+    """
+    m = w.shape[0]
+    if self.seg_sums is None or self.seg_shift is None:
+      self.seg_sums = w.reshape(m, self.k, self.seg_size).sum(axis=2, dtype=np.float64)
+      self.head = 0
+    else:
+      # Overwrite the segments that left the window with the entering ones
+      new_sums = w[:, self.n - self.seg_shift*self.seg_size:].reshape(
+        m, self.seg_shift, self.seg_size).sum(axis=2, dtype=np.float64)
+      positions = (self.head + np.arange(self.seg_shift)) % self.k
+      self.seg_sums[:, positions] = new_sums
+      self.head = (self.head + self.seg_shift) % self.k
+    # Unroll the ring buffer into window order
+    order = (self.head + np.arange(self.k)) % self.k
+    seg_means = self.seg_sums[:, order] / self.seg_size
+    W_paa = (seg_means - x_bar[:, np.newaxis]) / denominator[:, np.newaxis]
+    return W_paa.astype(w.dtype, copy=False)
+
+
 def paa_pyts_unoptimized(data, n: int, k: int):
   """
   Perform PAA on a time series using the pyts package.
@@ -0,0 +1,87 @@
+# Standard library imports
+from concurrent.futures import ProcessPoolExecutor
+import os
+# Third-party imports
+import numpy as np
+# Local imports
+from corr_join import corr_join
+import util
+
+
+def run_window_chunk(shm_name: str, shape, dtype, n: int, h: int, T: float,
+  k_s: int, k_e: int, k_b: int, alpha_start: int, alpha_stop: int, options):
+  """
+  Run corr_join on a range of windows of the time series in shared memory.
+  This is the task of one worker process.
+
+  Returns:
+  tuple: The result of corr_join for the windows alpha_start to alpha_stop.
+  """
+  shm, t_series = util.attach_shared_array(shm_name, shape, dtype)
+  try:
+    result = corr_join(t_series, n, h, T, k_s, k_e, k_b,
+      alpha_start=alpha_start, alpha_stop=alpha_stop, **options)
+  finally:
+    del t_series
+    shm.close()
+  return result
+
+
+def parallel_corr_join(t_series, n: int, h: int, T: float, k_s: int, k_e: int,
+  k_b: int, alpha_start: int = 0, alpha_stop = None, workers = None,
+  chunks_per_worker: int = 4, **options):
+  """
+  Run CorrJoin on several cores. The windows are independent, thus the range
+  of windows is split into contiguous chunks that run in a process pool. The
+  workers read the time series from shared memory instead of receiving a
+  pickled copy.
+
+  Parameters:
+  t_series (pandas.DataFrame or np.ndarray): The time series, one per row.
+  n, h, T, k_s, k_e, k_b: See util.get_params.
+  alpha_start, alpha_stop: The range of windows to process, see
+  util.window_range.
+  workers (int): The number of worker processes. Defaults to the number of
+  CPUs.
+  chunks_per_worker (int): The number of chunks per worker, more chunks
+  balance the load better.
+  options: Further keyword arguments for corr_join. A sink isn't supported,
+  because each worker would write to its own copy.
+
+  Returns:
+  tuple: The number of correlated window pairs, the mean overall pruning rate
+  and the mean time of each section in nanoseconds, like corr_join. An empty
+  window range doesn't start any worker.
+  """
+  print('log info: running parallel CorrJoin')
+  if options.get("sink") is not None:
+    raise ValueError("parallel_corr_join doesn't support a result sink")
+  windows = util.window_range(t_series.shape[1], n, h, alpha_start, alpha_stop)
+  if len(windows) == 0:
+    # Nothing to merge, the result of an empty range like corr_join
+    return 0, util.mean_pruning_rate([]), np.zeros(5, dtype=int)
+  workers = os.cpu_count() if workers is None else workers
+  # Contiguous chunks of windows, the first and the last window of each chunk
+  num_chunks = min(len(windows), workers*chunks_per_worker)
+  bounds = np.linspace(windows.start, windows.stop, num_chunks + 1).astype(int)
+  chunks = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+  t_series = util.as_time_series_matrix(t_series)
+  shm, _ = util.share_array(t_series)
+  try:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      futures = [executor.submit(run_window_chunk, shm.name, t_series.shape,
+        t_series.dtype, n, h, T, k_s, k_e, k_b, start, stop, options)
+        for start, stop in chunks]
+      results = [future.result() for future in futures]
+  finally:
+    shm.close()
+    shm.unlink()
+
+  # Merge the results, the means are weighted by the windows of each chunk
+  num_windows = np.array([stop - start for start, stop in chunks])
+  num_corr_pairs = sum(result[0] for result in results)
+  pruning_rate = np.average([result[1] for result in results], weights=num_windows)
+  section_times = np.round(np.average([result[2] for result in results],
+    axis=0, weights=num_windows)).astype(int)
+  return num_corr_pairs, pruning_rate, section_times
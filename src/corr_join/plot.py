@@ -20,7 +20,7 @@ def compute_avg_runtime(df):
       'Euclidean distance filter time [ns]', 
       'Pearson correlation computation time [ns]'
     ]
-  ].sum(axis=1).div(1e9)  # Sum along columns for each row
+  ].sum(axis=1, min_count=1).div(1e9)  # Sum along columns for each row, NaN without times
   return df
 
 
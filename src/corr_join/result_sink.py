@@ -0,0 +1,149 @@
+# Standard library imports
+import glob
+import os
+# Third-party imports
+import numpy as np
+# Local imports
+
+
+# One correlated window pair per record
+pair_dtype = np.dtype([("i", np.int64), ("j", np.int64), ("alpha", np.int64),
+  ("corr", np.float64)])
+
+
+class CountSink:
+  """
+  Only count the correlated window pairs.
+  All sinks receive the correlated pairs of a window at once with
+  write(alpha, pairs, corrcoefs) and are closed by their owner with close().
+  """
+
+  def __init__(self):
+    self.num_pairs = 0
+
+  def write(self, alpha: int, pairs, corrcoefs):
+    """
+    Parameters:
+    alpha (int): The window number.
+    pairs (np.ndarray): The correlated pairs (i, j), i < j, one per row.
+    corrcoefs (np.ndarray): The Pearson correlation of each pair.
+    """
+    self.num_pairs += len(pairs)
+
+  def close(self):
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *_):
+    self.close()
+
+
+class ArraySink(CountSink):
+  """
+  Collect the correlated window pairs in memory, column by column.
+  """
+
+  def __init__(self):
+    super().__init__()
+    self.chunks = []
+
+  def write(self, alpha: int, pairs, corrcoefs):
+    super().write(alpha, pairs, corrcoefs)
+    if len(pairs) > 0:
+      self.chunks.append(to_records(alpha, pairs, corrcoefs))
+
+  def columns(self):
+    """
+    Returns:
+    dict: The np.ndarrays "i", "j", "alpha" and "corr" with one entry per pair.
+    """
+    records = np.concatenate(self.chunks) if self.chunks else np.empty(0, pair_dtype)
+    return {name: records[name] for name in pair_dtype.names}
+
+
+class NpyChunkSink(CountSink):
+  """
+  Write the correlated window pairs to .npy files in a directory. The pairs
+  of each window are buffered as one block and written to a new file
+  pairs-{number}.npy once the buffer holds chunk_pairs pairs, and on close.
+  Read the files with read_npy_chunks.
+
+  Parameters:
+  directory (str): The output directory. It is created if necessary. The
+  pairs-*.npy files of an earlier sink in this directory are deleted, so
+  read_npy_chunks only reads the pairs of this sink.
+  chunk_pairs (int): The number of buffered pairs that triggers a write.
+  """
+
+  def __init__(self, directory: str, chunk_pairs: int = 2**20):
+    super().__init__()
+    self.directory = directory
+    self.chunk_pairs = chunk_pairs
+    self.buffer = []
+    self.num_buffered = 0
+    self.num_files = 0
+    os.makedirs(directory, exist_ok=True)
+    for path in chunk_paths(directory):
+      os.remove(path)
+
+  def write(self, alpha: int, pairs, corrcoefs):
+    super().write(alpha, pairs, corrcoefs)
+    if len(pairs) == 0:
+      return
+    self.buffer.append(to_records(alpha, pairs, corrcoefs))
+    self.num_buffered += len(pairs)
+    if self.num_buffered >= self.chunk_pairs:
+      self.flush()
+
+  def flush(self):
+    """
+    Write the buffered pairs to a new file.
+    """
+    if not self.buffer:
+      return
+    np.save(os.path.join(self.directory, f"pairs-{self.num_files:06d}.npy"),
+      np.concatenate(self.buffer))
+    self.num_files += 1
+    self.buffer = []
+    self.num_buffered = 0
+
+  def close(self):
+    self.flush()
+
+
+def to_records(alpha: int, pairs, corrcoefs):
+  """
+  Convert the correlated pairs of a window to records of pair_dtype.
+  """
+  records = np.empty(len(pairs), dtype=pair_dtype)
+  records["i"] = pairs[:, 0]
+  records["j"] = pairs[:, 1]
+  records["alpha"] = alpha
+  records["corr"] = corrcoefs
+  return records
+
+
+def read_npy_chunks(directory: str, mmap_mode = None):
+  """
+  Read the files of an NpyChunkSink.
+
+  Parameters:
+  directory (str): The output directory of the sink.
+  mmap_mode: Passed to np.load, e.g. 'r' to memory-map the files.
+
+  Returns:
+  list of np.ndarrays: The records of each file, in the order they were
+  written.
+  """
+  return [np.load(path, mmap_mode=mmap_mode) for path in chunk_paths(directory)]
+
+
+def chunk_paths(directory: str):
+  """
+  Returns:
+  list of str: The paths of the files of an NpyChunkSink in the order they
+  were written.
+  """
+  return sorted(glob.glob(os.path.join(directory, "pairs-*.npy")))
@@ -0,0 +1,165 @@
+# Standard library imports
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import product
+import logging
+import os
+from time import perf_counter_ns
+# Third-party imports
+# Local imports
+from load_data import load_data
+from main import RowBuffer, algorithms, experiments, log_run, run_algorithm
+import util
+
+
+# Relative runtime of the algorithms, the runs are started in decreasing
+# order of cost, such that the long brute-force runs don't end up last on a
+# single busy core while the other cores idle
+algorithm_costs = {
+  "brute_force_p_corr": 16,
+  "brute_force_euc_dist": 8,
+  "corr_join_unoptimized": 4,
+  "brute_force_blocked": 2,
+  "corr_join_sweep": 2,
+  "corr_join": 1,
+}
+
+# The runs of the gen_* functions of main.py
+experiment_spec = [entry for entries in experiments.values() for entry in entries]
+
+
+def expand_experiments(spec):
+  """
+  Expand an experiment spec into independent runs.
+
+  Parameters:
+  spec (list of dicts): Entries like those of main.experiments. Every
+  combination is one run, alpha_start and alpha_stop can be set in the
+  options.
+
+  Returns:
+  list of tuples: The runs (dataset, m, params, algorithm, options), sorted by
+  decreasing estimated cost, see run_cost.
+  """
+  runs = []
+  for entry in spec:
+    options = entry.get("options", {})
+    for algorithm in entry["algorithms"]:
+      if algorithm not in algorithms:
+        raise ValueError(f"Unknown algorithm {algorithm}, choose one of {list(algorithms)}")
+    for dataset, m, params, algorithm in product(entry["datasets"], entry["m"],
+      entry["params"], entry["algorithms"]):
+      runs.append((dataset, m, params, algorithm, dict(options)))
+  # sorted is stable, runs of equal cost keep the order of the spec
+  return sorted(runs, key=run_cost, reverse=True)
+
+
+def run_cost(run):
+  """
+  Estimate the relative runtime of a run, all algorithms are quadratic in m.
+  Runs on the whole dataset (m = -1) are the most expensive of their algorithm.
+  """
+  _, m, _, algorithm, _ = run
+  return algorithm_costs[algorithm]*(m*m if m != -1 else float('inf'))
+
+
+def load_sizes(runs):
+  """
+  Determine the number of time series to load for each dataset: the largest
+  m of its runs. Runs with m = -1 load the whole dataset instead, because
+  load_data doesn't return all time series for every dataset then, e.g.
+  synthetic_correlated_data generates 1000.
+
+  Returns:
+  dict: The largest m of the runs of each dataset, -1 if all its runs use
+  m = -1.
+  """
+  sizes = {}
+  for dataset, m, _, _, _ in runs:
+    sizes[dataset] = max(m, sizes.get(dataset, -1))
+  return sizes
+
+
+@lru_cache(maxsize=None)
+def cached_data(dataset: str, m: int):
+  """
+  Load m time series of a dataset once per worker process, the runs select
+  their first time series from it.
+  """
+  return load_data(dataset, m)
+
+
+def first_rows(time_series, m: int):
+  """
+  Select the first m time series of a dataset, without copying a DataFrame.
+  """
+  if m == -1:
+    return time_series
+  if hasattr(time_series, "iloc"):
+    return time_series.iloc[:m]
+  return time_series[:m]
+
+
+def execute_run(run, load_size: int):
+  """
+  Execute one run in a worker process.
+
+  Parameters:
+  run (tuple): See expand_experiments.
+  load_size (int): The number of time series to load, see load_sizes.
+
+  Returns:
+  tuple: The rows for the performance log and the wall-clock time of the run
+  in seconds, including loading the dataset if this worker didn't load it yet.
+  """
+  wall_start = perf_counter_ns()
+  dataset, m, params, algorithm, options = run
+  time_series = first_rows(cached_data(dataset, -1 if m == -1 else load_size), m)
+  rows = RowBuffer()
+  run_algorithm(time_series, dataset, params, algorithm, rows, **options)
+  return rows.rows, (perf_counter_ns()-wall_start)/1e9
+
+
+def run_experiments(spec, perf_logger, max_workers = None, mp_context = None):
+  """
+  Run the experiments of a spec across a process pool and log the rows of
+  each run with its wall-clock time to the performance log, see main.log_run.
+  Only this process writes to the log, the workers return their rows, so
+  concurrent runs never interleave their lines. The rows are logged in the
+  order the runs finish.
+  Each worker runs one algorithm at a time, so set the number of BLAS threads
+  (e.g. OMP_NUM_THREADS=1) to avoid oversubscribing the cores.
+
+  Parameters:
+  spec (list of dicts): See expand_experiments.
+  perf_logger: The logger of util.create_csv_logger.
+  max_workers (int): The number of worker processes, defaults to the number
+  of cores.
+  mp_context: The multiprocessing context of the pool, defaults to the
+  default start method of the platform.
+
+  Returns:
+  list of tuples: The run and its wall-clock time in seconds, in the order
+  the runs finished.
+  """
+  runs = expand_experiments(spec)
+  sizes = load_sizes(runs)
+  max_workers = max_workers or os.cpu_count()
+  print(f"log info: {len(runs)} runs on {max_workers} workers")
+  wall_times = []
+  with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+    # The pool starts the runs in submission order, i.e. the expensive first
+    futures = {executor.submit(execute_run, run, sizes[run[0]]): run for run in runs}
+    for future in as_completed(futures):
+      run = futures[future]
+      rows, wall_time = future.result()
+      log_run(perf_logger, rows, wall_time)
+      wall_times.append((run, wall_time))
+      print(f"log info: {len(wall_times)}/{len(runs)} {run[0]} m={run[1]} {run[2]} {run[3]}: {round(wall_time, 3)} s")
+  return wall_times
+
+
+if __name__ == '__main__':
+  perf_logger = util.create_csv_logger("performance_logger", logging.INFO,
+    "performance_log.csv")
+  run_experiments(experiment_spec, perf_logger)
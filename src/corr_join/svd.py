@@ -1,25 +1,169 @@
 import numpy as np
 
-def custom_svd(W_s, k_b: int):
+def custom_svd(W_s, k_b: int, backend: str = "exact"):
   """
   Perform reduced SVD.
 
   Parameters:
   W_s (array-like): A matrix with m rows.
   k_b: The number of dimensions for the output W_b.
+  backend (str): "exact", "gram" or "randomized", see svd_backends. All
+  backends return W_b = W_s*V_k with orthonormal columns V_k, a projection
+  that doesn't increase distances. "exact" and "gram" return the same W_b up
+  to the sign of each column, "randomized" approximates V_k.
 
   Returns:
   W_b (ndarray): A matrix consisting of m k_b-dimensional windows.
   """
-  try: 
+  if backend not in svd_backends:
+    raise ValueError(f"Unknown SVD backend {backend}, choose one of {list(svd_backends)}")
+  return svd_backends[backend](W_s, k_b)
+
+
+def exact_svd(W_s, k_b: int):
+  """
+  Compute W_b = U_k*D_k with a full reduced SVD of W_s.
+  """
+  try:
     # u.shape is mxm, s.shape is mx1, v.shape is nxn
     u, s, v = np.linalg.svd(W_s, full_matrices=False)   # specify full_matrices=False to do reduced SVD
-  except np.linalg.LinAlgError:
-    print("SVD computation does not converge.")
-  # from the output of SVD we choose the first kb dimensions for the bucketing, 
+  except np.linalg.LinAlgError as error:
+    raise np.linalg.LinAlgError("SVD computation does not converge.") from error
+  # from the output of SVD we choose the first kb dimensions for the bucketing,
   # i.e., reduce the number of columns of U and D to k_b and then compute: U_k*D_k
-  u_k = u[:, :k_b]
-  d = np.diag(s)
-  d_k = d[:k_b, :k_b]
-  W_b = np.matmul(u_k, d_k)
-  return W_b
+  # Scale the columns of U_k instead of multiplying with the diagonal matrix D_k
+  return u[:, :k_b] * s[:k_b]
+
+
+def gram_svd(W_s, k_b: int):
+  """
+  Compute W_b from the eigendecomposition of the k_s x k_s Gram matrix
+  W_s^T W_s, whose eigenvectors are the right singular vectors V of W_s.
+  Since U*D = W_s*V, W_b = W_s*V_k. The cost is O(m*k_s^2) for the Gram matrix,
+  cheap when m is much larger than k_s. Squaring W_s squares its condition
+  number, which only affects the small singular values that W_b drops.
+  """
+  eigenvalues, eigenvectors = np.linalg.eigh(W_s.T @ W_s)
+  # eigh sorts the eigenvalues in ascending order
+  v_k = eigenvectors[:, ::-1][:, :k_b]
+  return W_s @ v_k
+
+
+def randomized_svd(W_s, k_b: int, oversampling: int = 5, power_iterations: int = 2,
+  seed: int = 0):
+  """
+  Compute W_b with the randomized range finder of Halko et al. Project W_s
+  onto k_b + oversampling random directions, sharpen the subspace with a few
+  power iterations and compute the SVD of the small projected matrix. Its
+  right singular vectors approximate V_k, so W_b = W_s*V_k like gram_svd.
+
+  Parameters:
+  W_s, k_b: See custom_svd.
+  oversampling (int): The number of extra random directions.
+  power_iterations (int): The number of power iterations.
+  seed (int): Seed of the random directions, so that runs are reproducible.
+  """
+  l = min(k_b + oversampling, min(W_s.shape))
+  rng = np.random.default_rng(seed)
+  omega = rng.standard_normal((W_s.shape[1], l)).astype(W_s.dtype, copy=False)
+  q, _ = np.linalg.qr(W_s @ omega)
+  for _ in range(power_iterations):
+    # Orthonormalize in between to not lose the small directions to rounding
+    q, _ = np.linalg.qr(W_s.T @ q)
+    q, _ = np.linalg.qr(W_s @ q)
+  # W_s ~ Q*B with B = Q^T*W_s of shape (l, k_s)
+  _, _, vt = np.linalg.svd(q.T @ W_s, full_matrices=False)
+  # Q*U_B*D_B would be the projection Q*Q^T*W_s*V_k, which can shrink the
+  # distances of W_s*V_k, so project W_s onto the orthonormal V_k directly
+  return W_s @ vt[:k_b].T
+
+
+svd_backends = {
+  "exact": exact_svd,
+  "gram": gram_svd,
+  "randomized": randomized_svd,
+}
+
+
+class IncrementalSVD:
+  """
+  Compute W_b for consecutive windows by tracking the top-k_b right singular
+  vectors V_k of W_s, so that W_b = W_s*V_k. Consecutive windows overlap, so
+  V_k changes slowly: each window refines the basis of the previous window
+  with a few subspace iterations on the Gram matrix W_s^T W_s and only falls
+  back to a full SVD if the residual of the refined basis is too large.
+  The columns of V_k keep the orientation of the previous window, so W_b
+  doesn't flip signs between windows.
+  Any orthonormal V_k keeps the bucketing filter exact, because the
+  projection doesn't increase distances. A less accurate basis only prunes
+  fewer pairs.
+
+  Parameters:
+  k_b (int): The number of dimensions for the output W_b.
+  iterations (int): The number of subspace iterations per window.
+  tolerance (float): The largest accepted relative residual
+  ||G*V - V*L|| / ||L|| of the refined basis V with Ritz values L.
+  """
+
+  def __init__(self, k_b: int, iterations: int = 2, tolerance: float = 1e-2):
+    self.k_b = k_b
+    self.iterations = iterations
+    self.tolerance = tolerance
+    self.reset()
+
+  def reset(self):
+    """
+    Forget the basis, the next window computes a full SVD.
+    """
+    self.v_k = None   # Basis of the previous window, shape (k_s, k_b)
+    self.num_full = 0   # Number of full SVDs
+    self.num_updates = 0  # Number of accepted subspace iteration updates
+
+  def transform(self, W_s):
+    """
+    Compute W_b for the next window. Call this once per window, in window
+    order.
+
+    Parameters:
+    W_s (np.ndarray): A matrix with m rows and k_s columns.
+
+    Returns:
+    W_b (ndarray): A matrix consisting of m k_b-dimensional windows.
+    """
+    v_k = None
+    if self.v_k is not None and self.v_k.shape[0] == W_s.shape[1]:
+      v_k = self._update(W_s)
+    if v_k is None:
+      _, _, vt = np.linalg.svd(W_s, full_matrices=False)
+      v_k = vt[:self.k_b].T
+      self.num_full += 1
+    else:
+      self.num_updates += 1
+    # Orient the columns like the previous basis, or the first window such
+    # that the largest entry of each column is positive
+    reference = self.v_k if (self.v_k is not None and self.v_k.shape == v_k.shape) else None
+    if reference is None:
+      signs = np.sign(v_k[np.argmax(np.abs(v_k), axis=0), np.arange(v_k.shape[1])])
+    else:
+      signs = np.sign(np.sum(v_k*reference, axis=0))
+    v_k = v_k * np.where(signs == 0, 1, signs).astype(v_k.dtype)
+    self.v_k = v_k
+    return W_s @ v_k
+
+  def _update(self, W_s):
+    """
+    Refine the previous basis with subspace iterations and the Rayleigh-Ritz
+    procedure. Returns None if the residual check fails.
+    """
+    gram = W_s.T @ W_s
+    v_k = self.v_k.astype(W_s.dtype, copy=False)
+    for _ in range(self.iterations):
+      v_k, _ = np.linalg.qr(gram @ v_k)
+    # Rotate the basis to the Ritz vectors, sorted by decreasing Ritz value
+    ritz_values, rotation = np.linalg.eigh(v_k.T @ gram @ v_k)
+    ritz_values, rotation = ritz_values[::-1], rotation[:, ::-1]
+    v_k = v_k @ rotation
+    residual = np.linalg.norm(gram @ v_k - v_k*ritz_values)
+    if not residual <= self.tolerance*np.linalg.norm(ritz_values):
+      return None
+    return v_k
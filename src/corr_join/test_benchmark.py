@@ -0,0 +1,60 @@
+# Standard library imports
+import copy
+import json
+# Third-party imports
+import numpy as np
+# Local imports
+from benchmark import compare_to_baseline, kernels, pipeline_inputs, run_benchmarks
+from corr_join import corr_join
+
+
+def test_run_benchmarks():
+  """
+  Test if every kernel runs on a small grid and the report is valid JSON with
+  one result per kernel and parameter combination.
+  """
+  grids = {name: {key: values[:1] for key, values in kernels[name]["grid"].items()}
+    for name in kernels}
+  grids["normalization"] = {"m": [50, 100], "n": [300]}
+  for grid in grids.values():
+    grid["m"] = [min(m, 200) for m in grid["m"]]
+  report = run_benchmarks(grids=grids, repeats=3)
+  report = json.loads(json.dumps(report))
+  assert len(report["results"]) == len(kernels) + 1
+  for result in report["results"]:
+    assert result["median"] > 0 and result["variance"] >= 0
+    assert result["min"] <= result["median"]
+    assert result["ops_per_sec"] == result["ops"]/result["median"]
+
+
+def test_pipeline_inputs():
+  """
+  Test if the kernel inputs of one window lead to the correlated pairs of
+  corr_join on the same window.
+  """
+  params = {"m": 100, "n": 300, "T": 0.85, "k_s": 15, "k_e": 30, "k_b": 3}
+  inputs = pipeline_inputs(params)
+  C_2 = inputs["C_2"]
+  distances = np.linalg.norm(inputs["W"][C_2[:, 0]] - inputs["W"][C_2[:, 1]], axis=1)
+  num_corr_pairs, _, _ = corr_join(inputs["w"], 300, 300, 0.85, 15, 30, 3)
+  assert num_corr_pairs > 0
+  assert np.sum(distances <= np.sqrt(2*(1-0.85))) == num_corr_pairs
+
+
+def test_compare_to_baseline():
+  """
+  Test if only the results slower than the tolerance are flagged.
+  """
+  baseline = {"results": [
+    {"kernel": "normalization", "params": {"m": 1, "n": 2}, "median": 1.0},
+    {"kernel": "normalization", "params": {"m": 2, "n": 2}, "median": 1.0},
+    {"kernel": "custom_svd", "params": {"m": 1}, "median": 1.0},
+  ]}
+  report = copy.deepcopy(baseline)
+  report["results"][0]["median"] = 1.05
+  report["results"][1]["median"] = 1.5
+  del report["results"][2]
+  report["results"].append({"kernel": "paa_pyts", "params": {"m": 1}, "median": 9.0})
+  comparison = compare_to_baseline(report, baseline, tolerance=0.1)
+  assert [entry["regression"] for entry in comparison] == [False, True]
+  assert comparison[1]["ratio"] == 1.5
@@ -0,0 +1,26 @@
+# Standard library imports
+# Third-party imports
+import pytest
+# Local imports
+from brute_force_blocked import brute_force_blocked
+from brute_force_euc_dist import brute_force_euc_dist
+from brute_force_p_corr import brute_force_p_corr
+from test_corr_join_stream import get_correlated_random_walks
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 2048])
+def test_brute_force_blocked(block_size: int):
+  """
+  Test if the blocked brute force finds the same number of correlated window
+  pairs as the pairwise brute force algorithms, with tiles smaller than m,
+  not dividing m and larger than m.
+  """
+  df = get_correlated_random_walks(m=30, len_ts=600)
+  params = (200, 50, 0.8)
+  num_corr_pairs, pruning_rate, section_times = brute_force_blocked(df, *params,
+    alpha_stop=5, block_size=block_size)
+  assert num_corr_pairs > 0
+  assert num_corr_pairs == brute_force_p_corr(df, *params, alpha_stop=5)[0]
+  assert num_corr_pairs == brute_force_euc_dist(df, *params, alpha_stop=5)[0]
+  assert pruning_rate == 0
+  assert len(section_times) == 5
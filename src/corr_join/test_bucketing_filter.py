@@ -0,0 +1,129 @@
+# Standard library imports
+from itertools import product
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from bucketing_filter import (BucketIndex, bucketing_filter,
+  bucketing_filter_unoptimized, get_moves, parallel_bucketing_filter)
+
+
+def get_W_b(m: int, k_b: int, seed: int = 0):
+  """
+  Returns:
+    np.ndarray: m random points in k_b dimensions, clustered like W_b.
+  """
+  rng = np.random.default_rng(seed)
+  centers = rng.normal(scale=0.3, size=(5, k_b))
+  return centers[rng.integers(0, 5, m)] + rng.normal(scale=0.05, size=(m, k_b))
+
+
+def sorted_pairs(C):
+  """
+  Orient each pair as (i, j) with i < j and sort the pairs lexicographically.
+  """
+  C = np.sort(C, axis=1)
+  return C[np.lexsort((C[:, 1], C[:, 0]))]
+
+
+@pytest.mark.parametrize("k_b", [1, 2, 3, 4])
+def test_get_moves_half(k_b: int):
+  """
+  Test if the half moves and their mirrors cover the 3^k_b neighborhood
+  exactly once, without the zero move.
+  """
+  half = get_moves(k_b, half=True)
+  moves = np.vstack((half, -half))
+  neighborhood = set(product([-1, 0, 1], repeat=k_b)) - {(0,)*k_b}
+  assert len(moves) == len(neighborhood) == 3**k_b - 1
+  assert {tuple(move) for move in moves.tolist()} == neighborhood
+  # The first non-zero component of each half move is positive
+  assert all(move[np.flatnonzero(move)[0]] == 1 for move in half)
+
+
+@pytest.mark.parametrize("k_b", [1, 2, 3])
+@pytest.mark.parametrize("eps", [0.02, 0.1, 0.4])
+def test_bucketing_filter_candidates(k_b: int, eps: float):
+  """
+  Test if the sparse bucket index yields the same candidate set as the
+  bucketing filter true to the pseudo code.
+  """
+  W_b = get_W_b(150, k_b)
+  C_1, pr_1 = bucketing_filter(W_b, k_b, eps)
+  C_1_ref, pr_1_ref = bucketing_filter_unoptimized(W_b, k_b, eps)
+  assert np.array_equal(sorted_pairs(C_1), sorted_pairs(C_1_ref))
+  assert pr_1 == pytest.approx(pr_1_ref)
+
+
+def test_bucketing_filter_range_join():
+  """
+  Test if the candidate set contains exactly the pairs within distance eps.
+  """
+  W_b = get_W_b(200, 3, seed=1)
+  eps = 0.08
+  C_1, _ = bucketing_filter(W_b, 3, eps)
+  i, j = np.triu_indices(len(W_b), k=1)
+  within = np.linalg.norm(W_b[i] - W_b[j], axis=1) <= eps
+  assert np.array_equal(sorted_pairs(C_1), np.vstack((i[within], j[within])).T)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_bucketing_filter_chunk_size(chunk_size: int):
+  """
+  Test if the candidate set doesn't depend on the chunk size.
+  """
+  W_b = get_W_b(150, 2, seed=2)
+  C_1, _ = bucketing_filter(W_b, 2, 0.1)
+  C_1_chunked, _ = bucketing_filter(W_b, 2, 0.1, chunk_size=chunk_size)
+  assert np.array_equal(sorted_pairs(C_1), sorted_pairs(C_1_chunked))
+
+
+@pytest.mark.parametrize("chunk_size", [7, 2**18])
+def test_bucketing_filter_blocks(chunk_size: int):
+  """
+  Test if comparing the buckets as blocks yields exactly the C_1 of the pair
+  by pair comparison, including the order of the pairs.
+  """
+  W_b = get_W_b(400, 3, seed=4)
+  C_1, _ = bucketing_filter(W_b, 3, 0.1, chunk_size=chunk_size, block_pairs=2**62)
+  C_1_blocks, _ = bucketing_filter(W_b, 3, 0.1, chunk_size=chunk_size, block_pairs=1)
+  assert len(C_1) > 0
+  assert np.array_equal(C_1_blocks, C_1)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_bucketing_filter(executor: str, workers: int):
+  """
+  Test if the parallel bucketing filter yields exactly the serial C_1.
+  """
+  W_b = get_W_b(300, 3, seed=3)
+  C_1, pr_1 = bucketing_filter(W_b, 3, 0.1, chunk_size=500)
+  C_1_par, pr_1_par = parallel_bucketing_filter(W_b, 3, 0.1, workers=workers,
+    executor=executor, chunk_size=500)
+  assert np.array_equal(C_1_par, C_1)
+  assert pr_1_par == pr_1
+
+
+@pytest.mark.parametrize("k_b", [1, 2, 3])
+@pytest.mark.parametrize("step", [0.002, 0.02, 0.2])
+def test_bucket_index(k_b: int, step: float):
+  """
+  Test if the persistent bucket index yields the same candidate sets as
+  bucketing_filter over drifting windows, with few moves, many moves and
+  rebuilds.
+  """
+  rng = np.random.default_rng(1)
+  eps = 0.05
+  W_b = get_W_b(300, k_b)
+  bucket_index = BucketIndex(k_b, eps)
+  for _ in range(15):
+    # Let a few time series drift per window
+    drift = rng.random(len(W_b)) < 0.1
+    W_b[drift] += rng.normal(scale=step, size=(np.sum(drift), k_b))
+    C_1, pr_1 = bucket_index.filter(W_b, k_b, eps)
+    C_1_ref, pr_1_ref = bucketing_filter(W_b, k_b, eps)
+    assert np.array_equal(sorted_pairs(C_1), sorted_pairs(C_1_ref))
+    assert pr_1 == pytest.approx(pr_1_ref)
+  if step < 0.2:
+    assert bucket_index.num_moved > 0
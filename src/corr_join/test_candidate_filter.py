@@ -0,0 +1,56 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from bucketing_filter import BucketIndex, bucketing_filter
+import candidate_filter
+from candidate_filter import get_candidate_filter, kdtree_filter
+from test_bucketing_filter import get_W_b, sorted_pairs
+
+
+@pytest.mark.parametrize("eps", [0.02, 0.1, 0.4])
+def test_kdtree_filter_candidates(eps: float):
+  """
+  Test if the KD-tree backend yields the same candidate set as the bucketing
+  filter.
+  """
+  W_b = get_W_b(300, 3)
+  C_1, pr_1 = kdtree_filter(W_b, 3, eps)
+  C_1_bkt, pr_1_bkt = bucketing_filter(W_b, 3, eps)
+  assert np.array_equal(sorted_pairs(C_1), sorted_pairs(C_1_bkt))
+  assert pr_1 == pytest.approx(pr_1_bkt)
+
+
+@pytest.mark.parametrize("eps, uses_kdtree", [(0.01, False), (1.0, True)])
+def test_auto_candidate_filter(monkeypatch, eps: float, uses_kdtree: bool):
+  """
+  Test if "auto" chooses the KD-tree when most windows share a few buckets,
+  and otherwise yields the candidates of the bucketing filter.
+  """
+  calls = []
+  def counting_kdtree_filter(*args):
+    calls.append(args)
+    return kdtree_filter(*args)
+  monkeypatch.setattr(candidate_filter, "kdtree_filter", counting_kdtree_filter)
+  W_b = get_W_b(300, 3)
+  C_1, pr_1 = get_candidate_filter("auto", 3, eps)(W_b, 3, eps)
+  C_1_bkt, pr_1_bkt = bucketing_filter(W_b, 3, eps)
+  assert len(calls) == uses_kdtree
+  assert np.array_equal(sorted_pairs(C_1), sorted_pairs(C_1_bkt))
+  assert pr_1 == pytest.approx(pr_1_bkt)
+
+
+def test_get_candidate_filter():
+  """
+  Test if the stateful backends are created per call and unknown backends
+  are rejected.
+  """
+  index_1 = get_candidate_filter("incremental_bucketing", 3, 0.1)
+  index_2 = get_candidate_filter("incremental_bucketing", 3, 0.1)
+  assert isinstance(index_1, BucketIndex) and index_1 is not index_2
+  W_b = get_W_b(300, 3)
+  C_1, _ = index_1(W_b, 3, 0.1)
+  assert np.array_equal(sorted_pairs(C_1), sorted_pairs(bucketing_filter(W_b, 3, 0.1)[0]))
+  with pytest.raises(ValueError):
+    get_candidate_filter("buckets", 3, 0.1)
@@ -0,0 +1,171 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pandas as pd
+import pytest
+# Local imports
+from accuracy_report import dtype_accuracy_report
+from corr_join import WindowPrefix, corr_join, corr_join_sweep, normalize_windows
+from paa import paa_reshape
+from result_sink import ArraySink
+from test_corr_join_stream import get_correlated_random_walks
+import util
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_float32_matches_float64(incremental: bool):
+  """
+  Test if corr_join in float32 with exact verification finds the same
+  correlated pairs as in float64.
+  """
+  df = get_correlated_random_walks()
+  n, h, T, k_s, k_e, k_b = 300, 20, 0.85, 15, 30, 3
+  columns = {}
+  for dtype in (np.float64, np.float32):
+    sink = ArraySink()
+    corr_join(df, n, h, T, k_s, k_e, k_b, incremental=incremental, dtype=dtype,
+      sink=sink)
+    columns[np.dtype(dtype).name] = sink.columns()
+  assert len(columns["float64"]["i"]) > 0
+  for name in ("i", "j", "alpha"):
+    assert np.array_equal(columns["float32"][name], columns["float64"][name])
+
+
+def get_near_threshold_series(m: int, n: int, T: float, spread: float,
+  offset: float, seed: int = 0):
+  """
+  Returns:
+    pandas.DataFrame: m time series of length n. The first one has a Pearson
+    correlation within T +- spread with each of the others, plus an offset,
+    which costs float32 precision.
+  """
+  rng = np.random.default_rng(seed)
+  u = rng.normal(size=n)
+  u -= u.mean()
+  u /= np.linalg.norm(u)
+  rows = [u]
+  for T_k in T + np.linspace(-spread, spread, m - 1):
+    # A centered unit vector orthogonal to u
+    v = rng.normal(size=n)
+    v -= v.mean()
+    v -= (v @ u)*u
+    v /= np.linalg.norm(v)
+    rows.append(T_k*u + np.sqrt(1 - T_k**2)*v)
+  return pd.DataFrame(np.array(rows) + offset)
+
+
+def test_dtype_accuracy_report():
+  """
+  Test if the report lists exactly the pairs that only one mode finds, on
+  pairs whose correlation is within float32 precision of T.
+  """
+  n, h, T, k_s, k_e, k_b = 300, 300, 0.85, 15, 30, 3
+  df = get_near_threshold_series(40, n, T, 1e-5, 1000)
+  report = dtype_accuracy_report(df, n, h, T, k_s, k_e, k_b,
+    exact_verification=False)
+  assert list(report.columns) == ["alpha", "i", "j", "found_by", "corr"]
+  assert set(report["found_by"]) == {"float64", "float32"}
+  # A pair found only in float64 is correlated, one found only in float32 not
+  assert (report["corr"][report["found_by"] == "float64"] >= T).all()
+  assert (report["corr"][report["found_by"] == "float32"] < T).all()
+  # The exact verification classifies these pairs like float64
+  assert len(dtype_accuracy_report(df, n, h, T, k_s, k_e, k_b)) == 0
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+@pytest.mark.parametrize("filter_backend", ["bucketing", "kdtree"])
+def test_corr_join_sweep(incremental: bool, filter_backend: str):
+  """
+  Test if the sweep finds the same number of correlated window pairs and the
+  same pruning rates as one corr_join run per threshold.
+  """
+  df = get_correlated_random_walks()
+  n, h, k_s, k_e, k_b = 300, 20, 15, 30, 3
+  Ts = [0.9, 0.7, 0.8, 0.95]
+  num_corr_pairs, pruning_rates, section_times = corr_join_sweep(df, n, h, Ts,
+    k_s, k_e, k_b, incremental=incremental, filter_backend=filter_backend)
+  assert len(section_times) == 5
+  for k, T in enumerate(Ts):
+    num_corr_pairs_T, pruning_rate_T, _ = corr_join(df, n, h, T, k_s, k_e, k_b,
+      incremental=incremental, filter_backend=filter_backend)
+    assert num_corr_pairs[k] == num_corr_pairs_T
+    assert pruning_rates[k] == pytest.approx(pruning_rate_T)
+
+
+@pytest.mark.parametrize("options", [{"dtype": np.float32}, {"verification": "dot"},
+  {"early_abandon": True}, {"incremental": True, "svd_backend": "incremental",
+  "filter_backend": "incremental_bucketing"}])
+def test_corr_join_sweep_options(options):
+  """
+  Test if the sweep supports the options of corr_join and writes the same
+  pairs and correlations to the sink of each threshold as corr_join. The
+  buckets of the sweep are those of the loosest threshold, so the pairs of a
+  window may come in a different order.
+  """
+  df = get_correlated_random_walks()
+  n, h, k_s, k_e, k_b = 300, 20, 15, 30, 3
+  Ts = [0.9, 0.8]
+  sinks = [ArraySink() for _ in Ts]
+  corr_join_sweep(df, n, h, Ts, k_s, k_e, k_b, sinks=sinks, **options)
+  for T, sink in zip(Ts, sinks):
+    sink_T = ArraySink()
+    corr_join(df, n, h, T, k_s, k_e, k_b, sink=sink_T, **options)
+    columns, columns_T = sink.columns(), sink_T.columns()
+    order = np.lexsort((columns["j"], columns["i"], columns["alpha"]))
+    order_T = np.lexsort((columns_T["j"], columns_T["i"], columns_T["alpha"]))
+    assert len(order_T) > 0
+    for name in ("i", "j", "alpha"):
+      assert np.array_equal(columns[name][order], columns_T[name][order_T])
+    assert np.allclose(columns["corr"][order], columns_T["corr"][order_T])
+
+
+def test_corr_join_sweep_unknown_backend():
+  """
+  Test if the sweep rejects unknown backends before processing a window.
+  """
+  df = get_correlated_random_walks()
+  with pytest.raises(ValueError):
+    corr_join_sweep(df, 300, 20, [0.8, 0.9], 15, 30, 3, filter_backend="buckets")
+  with pytest.raises(ValueError):
+    corr_join_sweep(df, 300, 20, [0.8, 0.9], 15, 30, 3, svd_backend="svd")
+
+
+@pytest.mark.parametrize("offset", [1000, 1e8])
+@pytest.mark.parametrize("n, h, num_windows", [(300, 20, 40), (500, 1, 499)])
+def test_incremental_normalization(n: int, h: int, num_windows: int, offset: float):
+  """
+  Test if the incremental mode computes the PAA and normalizes the rows of the
+  pairs like a normalization from scratch, also after the running sums were
+  updated over many windows without a refresh and for large offsets.
+  """
+  df = get_correlated_random_walks(m=10, len_ts=n + h*num_windows)
+  ts_windows = util.sliding_windows(df.to_numpy() + offset, n, h)
+  prefix = WindowPrefix(n, h, 20, 50, 3, incremental=True)
+  pairs = np.array([[0, 1], [2, 5], [3, 9], [5, 9]])
+  for alpha in range(num_windows):
+    w = ts_windows[:, alpha]
+    _, W_e, _ = prefix.transform(w)
+    assert np.allclose(W_e, paa_reshape(normalize_windows(w), n, 50), rtol=0, atol=1e-7)
+    W, index = prefix.pair_rows(pairs)
+    W_scratch, index_scratch = util.normalize_pair_rows(w, pairs)
+    assert np.array_equal(index, index_scratch)
+    assert np.allclose(W, W_scratch, rtol=0, atol=1e-9)
+  assert prefix.W is None
+
+
+@pytest.mark.parametrize("offset", [1e7, 1e8])
+def test_incremental_large_offset(offset: float):
+  """
+  Test if the incremental mode finds the same correlated pairs as the default
+  mode for time series with a large offset, where running sums of the raw
+  samples cancel catastrophically.
+  """
+  df = get_correlated_random_walks() + offset
+  columns = []
+  for incremental in (False, True):
+    sink = ArraySink()
+    corr_join(df, 300, 20, 0.85, 15, 30, 3, incremental=incremental, sink=sink)
+    columns.append(sink.columns())
+  assert len(columns[0]["i"]) > 0
+  for name in ("alpha", "i", "j"):
+    assert np.array_equal(columns[1][name], columns[0][name])
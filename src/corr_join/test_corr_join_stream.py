@@ -0,0 +1,88 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pandas as pd
+import pytest
+# Local imports
+from corr_join import corr_join
+import corr_join_stream
+from corr_join_stream import CorrJoinStream, replay
+from result_sink import ArraySink
+import util
+
+
+def get_correlated_random_walks(m: int = 40, len_ts: int = 1500):
+  """
+  Returns:
+    pandas.DataFrame: m random walks, each following one of four latent
+    random walks, plus an offset.
+  """
+  rng = np.random.default_rng(0)
+  latent = np.cumsum(rng.normal(size=(4, len_ts)), axis=1)
+  noise = np.cumsum(rng.normal(size=(m, len_ts)), axis=1)
+  return pd.DataFrame(latent[rng.integers(0, 4, m)] + 0.8*noise + 50)
+
+
+@pytest.mark.parametrize("h, offset", [(10, 0), (20, 0), (400, 0), (20, 1e7)])
+def test_stream_matches_batch(h: int, offset: float):
+  """
+  Test if the stream finds the same correlated window pairs as corr_join with
+  the default normalization from scratch, also if the samples arrive in chunks
+  that are not aligned with the stride and for time series with a large offset.
+  """
+  df = get_correlated_random_walks() + offset
+  n, T, k_s, k_e, k_b = 300, 0.85, 15, 30, 3
+  stream_sink, batch_sink = ArraySink(), ArraySink()
+  stream = CorrJoinStream(df.shape[0], n, h, T, k_s, k_e, k_b, sink=stream_sink)
+  t_series = df.to_numpy()
+  num_corr_pairs = 0
+  for start in range(0, t_series.shape[1], 7):
+    for _, correlated_pairs in stream.push(t_series[:, start:start+7]):
+      num_corr_pairs += correlated_pairs.shape[0]
+  num_corr_pairs_batch, _, _ = corr_join(df, n, h, T, k_s, k_e, k_b,
+    sink=batch_sink)
+  assert num_corr_pairs == num_corr_pairs_batch == stream_sink.num_pairs
+  columns, columns_batch = stream_sink.columns(), batch_sink.columns()
+  order = np.lexsort((columns["j"], columns["i"], columns["alpha"]))
+  order_batch = np.lexsort((columns_batch["j"], columns_batch["i"], columns_batch["alpha"]))
+  for name in ("i", "j", "alpha"):
+    assert np.array_equal(columns[name][order], columns_batch[name][order_batch])
+  assert np.allclose(columns["corr"][order], columns_batch["corr"][order_batch])
+
+
+def test_replay(monkeypatch):
+  """
+  Test if replay compares the correlated window pairs of the stream and the
+  batch run.
+  """
+  df = get_correlated_random_walks()
+  monkeypatch.setattr(corr_join_stream, "load_data", lambda dataset, m: df)
+  monkeypatch.setattr(util, "get_params", lambda params: (300, 20, 0.85, 15, 30, 3))
+  assert replay("walks", "test", max_windows=20)
+  # A stream that loses a pair doesn't match
+  push = CorrJoinStream.push
+  def lossy_push(self, samples):
+    results = push(self, samples)
+    if self.alpha == 5:
+      self.sink.chunks[-1] = self.sink.chunks[-1][1:]
+    return results
+  monkeypatch.setattr(CorrJoinStream, "push", lossy_push)
+  assert not replay("walks", "test", max_windows=20)
+
+
+def test_stream_incremental_backends():
+  """
+  Test if the stream finds the same number of correlated window pairs with
+  the incremental SVD and the persistent bucket index as corr_join with the
+  default backends.
+  """
+  df = get_correlated_random_walks()
+  n, h, T, k_s, k_e, k_b = 300, 10, 0.85, 15, 30, 3
+  stream = CorrJoinStream(df.shape[0], n, h, T, k_s, k_e, k_b,
+    filter_backend="incremental_bucketing", svd_backend="incremental")
+  num_corr_pairs = 0
+  for _, correlated_pairs in stream.push(df.to_numpy()):
+    num_corr_pairs += correlated_pairs.shape[0]
+  num_corr_pairs_batch, _, _ = corr_join(df, n, h, T, k_s, k_e, k_b)
+  assert num_corr_pairs == num_corr_pairs_batch
+  assert stream.candidate_filter.num_rebuilds < stream.alpha
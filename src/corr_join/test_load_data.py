@@ -1,11 +1,13 @@
 # Standard library imports
 # Third-party imports 
+import numpy as np
 import pandas as pd
 import pytest
 # Local imports
 import load_data as ld
 import util
 from corr_join import corr_join
+from result_sink import ArraySink
 
 
 def test_gdrive_m():
@@ -28,6 +30,69 @@ def test_gdrive_data_type():
   assert isinstance(result, pd.DataFrame), f"Expected result to be a pandas DataFrame, but got {type(result)}"
 
 
+def test_gdrive_cache(tmp_path, monkeypatch):
+  """
+  Test if gdrive returns the same data from the binary cache as from the text
+  file and rebuilds the cache when the text file changes.
+  """
+  monkeypatch.chdir(tmp_path)
+  (tmp_path / "data" / "google-drive").mkdir(parents=True)
+  data = np.random.default_rng(0).normal(size=(6, 40))
+  # The text files store one time series per column
+  np.savetxt("data/google-drive/toy.txt", data.T)
+  first = ld.gdrive("toy", 4)
+  assert (tmp_path / "data" / "google-drive" / "toy.npy").exists()
+  assert np.allclose(first.to_numpy(), data[:4])
+  assert np.allclose(ld.gdrive("toy").to_numpy(), data)
+
+  np.savetxt("data/google-drive/toy.txt", data[:2].T)
+  assert ld.gdrive("toy").shape == (2, 40)
+
+
+def test_synthetic_correlated(tmp_path):
+  """
+  Test if the generated data is deterministic and the same in memory, in a
+  memory-mapped file and for any chunk size, and if m' < m series are the
+  first m' series of m.
+  """
+  params = {"L": 500, "clusters": 3, "regime_length": 100, "seed": 7}
+  data, assignments = ld.synthetic_correlated(10, **params)
+  chunked, chunked_assignments = ld.synthetic_correlated(10, chunk_size=3,
+    path=str(tmp_path / "data.npy"), **params)
+  assert np.array_equal(np.load(tmp_path / "data.npy"), data)
+  assert np.array_equal(chunked, data) and np.array_equal(chunked_assignments, assignments)
+  assert np.array_equal(ld.synthetic_correlated(4, **params)[0], data[:4])
+  assert not np.array_equal(ld.synthetic_correlated(10, **{**params, "seed": 8})[0], data)
+  assert assignments.shape == (10, 5)
+
+
+def test_synthetic_correlated_planted_pairs():
+  """
+  Test if CorrJoin finds all planted pairs of each window in low-noise data
+  with regime changes, and if a series that changes its cluster within a
+  window has no planted pairs.
+  """
+  n, h, T, k_s, k_e, k_b = 300, 50, 0.85, 15, 30, 3
+  regime_length = 400
+  data, assignments = ld.synthetic_correlated(60, 2000, clusters=4, noise=0.1,
+    regime_length=regime_length, switch_probability=0.5, seed=3)
+  sink = ArraySink()
+  corr_join(data, n, h, T, k_s, k_e, k_b, sink=sink)
+  columns = sink.columns()
+  num_changing = 0
+  for alpha in range((2000 - n)//h + 1):
+    labels = ld.window_labels(assignments, n, h, regime_length, alpha)
+    in_window = columns["alpha"] == alpha
+    pairs = np.column_stack((columns["i"][in_window], columns["j"][in_window]))
+    planted = ld.planted_pairs(labels)
+    assert len(planted) > 0
+    assert set(map(tuple, planted)) <= set(map(tuple, pairs))
+    assert ld.planted_recall(labels, pairs) == 1
+    assert ld.planted_recall(labels, pairs[:0]) == 0
+    num_changing += np.sum(labels == -1)
+  assert num_changing > 0
+
+
 # def test_gdrive_num_corr_pairs():
 #   """
 #   Test if Corr Join yields the same result for gdrive as well as for gdrive_np.
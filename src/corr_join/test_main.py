@@ -0,0 +1,25 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from corr_join import corr_join
+from main import algorithm_label, performance_row
+
+
+def test_algorithm_label():
+  """
+  Test if the label names scalar options and types and rejects options that
+  would break the columns of the performance log.
+  """
+  assert algorithm_label(corr_join, {}) == "corr_join"
+  assert algorithm_label(corr_join, {"svd_backend": "gram", "dtype": np.float32,
+    "early_abandon": True, "memory_budget": 2**20}) == (
+    "corr_join+svd_backend=gram+dtype=float32+early_abandon=True+memory_budget=1048576")
+  row = performance_row("synthetic", 200, (300, 20, 0.85, 15, 30, 3),
+    algorithm_label(corr_join, {"dtype": np.float32}), 0.5, 10, 10**9, np.zeros(5))
+  assert len(row.split(",")) == 17
+  for options in ({"Ts": [0.8, 0.9]}, {"backend": "a,b"}, {"backend": "a+b"},
+    {"backend": "a=b"}, {"backend": "a\nb"}, {"sink": object()}):
+    with pytest.raises(ValueError):
+      algorithm_label(corr_join, options)
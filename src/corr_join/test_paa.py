@@ -0,0 +1,86 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from paa import IncrementalPAA, paa_multi_resolution, paa_pyts, paa_reshape
+
+
+def get_random_walks(m: int = 8, len_ts: int = 1200):
+  """
+  Returns:
+    np.ndarray: m random walks of length len_ts.
+  """
+  rng = np.random.default_rng(0)
+  return np.cumsum(rng.normal(size=(m, len_ts)), axis=1)
+
+
+def normalize(w):
+  w_centered = w - np.mean(w, axis=1)[:, np.newaxis]
+  return w_centered / np.sqrt(np.sum(np.power(w_centered, 2), axis=1))[:, np.newaxis]
+
+
+def test_paa_reshape():
+  """
+  Test if the reshape based PAA corresponds to the PAA of pyts.
+  """
+  W = normalize(get_random_walks()[:, :300])
+  assert np.allclose(paa_reshape(W, 300, 30), paa_pyts(W, 300, 30), atol=1e-12)
+
+
+def test_paa_multi_resolution():
+  """
+  Test if W_s derived from W_e corresponds to a separate PAA with k_s.
+  """
+  W = normalize(get_random_walks()[:, :300])
+  W_s, W_e = paa_multi_resolution(W, 300, 15, 30)
+  assert np.allclose(W_s, paa_pyts(W, 300, 15), atol=1e-12)
+  assert np.allclose(W_e, paa_pyts(W, 300, 30), atol=1e-12)
+
+
+def test_paa_multi_resolution_k_s_not_dividing_k_e():
+  W = normalize(get_random_walks()[:, :300])
+  with pytest.raises(ValueError):
+    paa_multi_resolution(W, 300, 20, 30)
+
+
+@pytest.mark.parametrize("h", [10, 20, 25, 300])
+def test_incremental_paa(h: int):
+  """
+  Test if the incremental PAA corresponds to the PAA of every window, both for
+  strides that line up with the segments and strides that don't.
+  """
+  n, k = 300, 30
+  ts = get_random_walks()
+  paa = IncrementalPAA(n, k, h)
+  for alpha in range((ts.shape[1]-n)//h + 1):
+    w = ts[:, alpha*h:alpha*h+n]
+    x_bar = np.mean(w, axis=1)
+    denominator = np.sqrt(np.sum(np.power(w - x_bar[:, np.newaxis], 2), axis=1))
+    assert np.allclose(paa.transform(w, x_bar, denominator),
+      paa_pyts(normalize(w), n, k), atol=1e-9)
+
+
+def test_incremental_paa_reset():
+  """
+  Test if the incremental PAA rejects invalid k, keeps the type of the
+  window, and starts from scratch after reset.
+  """
+  with pytest.raises(ValueError):
+    IncrementalPAA(300, 7, 10)
+  n, k, h = 300, 30, 20
+  ts = get_random_walks()
+  paa = IncrementalPAA(n, k, h)
+  for alpha in (0, 1, 2):
+    w = ts[:, alpha*h:alpha*h+n].astype(np.float32)
+    x_bar = np.mean(w, axis=1)
+    denominator = np.sqrt(np.sum(np.power(w - x_bar[:, np.newaxis], 2), axis=1))
+    assert paa.transform(w, x_bar, denominator).dtype == np.float32
+  # After reset, a window that doesn't follow the previous one is reduced
+  # from scratch
+  paa.reset()
+  w = ts[:, 7:7+n]
+  x_bar = np.mean(w, axis=1)
+  denominator = np.sqrt(np.sum(np.power(w - x_bar[:, np.newaxis], 2), axis=1))
+  assert np.allclose(paa.transform(w, x_bar, denominator),
+    paa_pyts(normalize(w), n, k), atol=1e-9)
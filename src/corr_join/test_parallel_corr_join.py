@@ -0,0 +1,38 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from corr_join import corr_join
+from parallel_corr_join import parallel_corr_join
+from test_corr_join_stream import get_correlated_random_walks
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_parallel_corr_join(incremental: bool):
+  """
+  Test if the parallel CorrJoin yields the same result as the serial one.
+  """
+  df = get_correlated_random_walks()
+  params = (300, 10, 0.85, 15, 30, 3)
+  num_corr_pairs, pruning_rate, _ = corr_join(df, *params,
+    incremental=incremental, alpha_start=2, alpha_stop=90)
+  num_corr_pairs_par, pruning_rate_par, _ = parallel_corr_join(df, *params,
+    alpha_start=2, alpha_stop=90, workers=2, incremental=incremental)
+  assert num_corr_pairs_par == num_corr_pairs
+  assert pruning_rate_par == pytest.approx(pruning_rate)
+
+
+@pytest.mark.filterwarnings("error")
+def test_parallel_corr_join_empty_range():
+  """
+  Test if an empty window range yields 0 correlated window pairs and the
+  pruning rate of corr_join.
+  """
+  df = get_correlated_random_walks(m=20, len_ts=600)
+  params = (300, 20, 0.85, 15, 30, 3)
+  num_corr_pairs, pruning_rate, section_times = parallel_corr_join(df, *params,
+    alpha_start=2, alpha_stop=2, workers=2)
+  assert num_corr_pairs == 0
+  assert pruning_rate == corr_join(df, *params, alpha_start=2, alpha_stop=2)[1]
+  assert np.array_equal(section_times, np.zeros(5))
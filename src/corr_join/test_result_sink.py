@@ -0,0 +1,62 @@
+# Standard library imports
+import os
+# Third-party imports
+import numpy as np
+from scipy.stats import pearsonr
+# Local imports
+from corr_join import corr_join
+from result_sink import ArraySink, CountSink, NpyChunkSink, read_npy_chunks
+import util
+from test_corr_join_stream import get_correlated_random_walks
+
+
+def test_result_sinks(tmp_path):
+  """
+  Test if all sinks receive the pairs corr_join counts and if the written
+  correlations are the Pearson correlations of the windows.
+  """
+  df = get_correlated_random_walks()
+  n, h, T, k_s, k_e, k_b = 300, 20, 0.85, 15, 30, 3
+  count_sink, array_sink = CountSink(), ArraySink()
+  with NpyChunkSink(str(tmp_path / "pairs"), chunk_pairs=100) as npy_sink:
+    for sink in (count_sink, array_sink, npy_sink):
+      num_corr_pairs, _, _ = corr_join(df, n, h, T, k_s, k_e, k_b, sink=sink)
+      assert sink.num_pairs == num_corr_pairs
+  assert npy_sink.num_files > 1
+
+  columns = array_sink.columns()
+  records = np.concatenate(read_npy_chunks(str(tmp_path / "pairs")))
+  for name in ("i", "j", "alpha", "corr"):
+    assert np.array_equal(records[name], columns[name])
+  assert (columns["i"] < columns["j"]).all()
+  assert (columns["corr"] >= T).all()
+  ts_windows = util.sliding_windows(df.to_numpy(), n, h)
+  for k in range(0, len(columns["i"]), 97):
+    w = ts_windows[:, columns["alpha"][k]]
+    corrcoef, _ = pearsonr(w[columns["i"][k]], w[columns["j"][k]])
+    assert abs(columns["corr"][k] - corrcoef) < 1e-9
+
+
+def test_npy_chunk_sink_reuse_directory(tmp_path):
+  """
+  Test if a sink in the directory of an earlier sink replaces its files
+  instead of mixing the pairs of both runs.
+  """
+  directory = str(tmp_path / "pairs")
+  pairs = np.array([[0, 1], [2, 3], [4, 5]])
+  with NpyChunkSink(directory, chunk_pairs=1) as sink:
+    for alpha in range(4):
+      sink.write(alpha, pairs, np.ones(len(pairs)))
+  assert len(read_npy_chunks(directory)) == 4
+  with open(os.path.join(directory, "notes.txt"), "w", encoding="utf-8") as notes:
+    notes.write("kept")
+  with NpyChunkSink(directory, chunk_pairs=1) as sink:
+    sink.write(7, pairs[:1], np.full(1, 0.5))
+  records = np.concatenate(read_npy_chunks(directory))
+  assert records.tolist() == [(0, 1, 7, 0.5)]
+  assert os.path.exists(os.path.join(directory, "notes.txt"))
+
+
+def test_array_sink_empty():
+  columns = ArraySink().columns()
+  assert all(len(column) == 0 for column in columns.values())
@@ -0,0 +1,102 @@
+# Standard library imports
+import multiprocessing
+# Third-party imports
+import pytest
+# Local imports
+from corr_join import corr_join
+import scheduler
+from test_corr_join_stream import get_correlated_random_walks
+import util
+
+
+class ListLogger:
+  """
+  Collect the logged rows instead of writing them to the performance log.
+  """
+
+  def __init__(self):
+    self.rows = []
+
+  def info(self, row):
+    self.rows.append(row)
+
+
+def test_expand_experiments():
+  """
+  Test if every combination is one run and the expensive runs come first.
+  """
+  spec = [{"datasets": ["synthetic", "gas"], "m": [50, 100], "params": ["m_params"],
+    "algorithms": ["corr_join", "brute_force_euc_dist"]}]
+  runs = scheduler.expand_experiments(spec)
+  assert len(runs) == 8
+  assert [run[3] for run in runs[:2]] == ["brute_force_euc_dist"]*2
+  assert [run[1] for run in runs[:2]] == [100, 100]
+  assert runs[-1][3] == "corr_join"
+  with pytest.raises(ValueError):
+    scheduler.expand_experiments([{**spec[0], "algorithms": ["unknown"]}])
+
+
+def test_run_experiments(monkeypatch):
+  """
+  Test if the pool logs one row per run with the results of a serial run.
+  """
+  df = get_correlated_random_walks()
+  # The workers are forked, such that they inherit the patched loader
+  monkeypatch.setattr(scheduler, "cached_data", lambda dataset, m: df)
+  monkeypatch.setattr(util, "get_params", lambda params: (300, 20, 0.85, 15, 30, 3))
+  spec = [{"datasets": ["walks"], "m": [20, -1], "params": ["test"],
+    "algorithms": ["corr_join", "brute_force_euc_dist"],
+    "options": {"alpha_stop": 10}},
+    {"datasets": ["walks"], "m": [-1], "params": ["test"],
+    "algorithms": ["corr_join"], "options": {"svd_backend": "gram"}},
+    {"datasets": ["walks"], "m": [-1], "params": [("test", "test")],
+    "algorithms": ["corr_join_sweep"], "options": {"alpha_stop": 10}}]
+  logger = ListLogger()
+  wall_times = scheduler.run_experiments(spec, logger, max_workers=2,
+    mp_context=multiprocessing.get_context("fork"))
+  assert len(wall_times) == 6
+  # The sweep logs a row per threshold and a row with the shared runtime
+  assert len(logger.rows) == 5 + 3
+  assert all(wall_time > 0 for _, wall_time in wall_times)
+  # The last column is the wall-clock time of the run
+  assert all(len(row.split(",")) == 18 and float(row.split(",")[-1]) >= 0
+    for row in logger.rows)
+
+  rows = {tuple(row.split(",")[:2] + row.split(",")[8:9]): row.split(",")
+    for row in logger.rows}
+  for m in (20, 40):
+    num_corr_pairs, _, _ = corr_join(df.iloc[:m], 300, 20, 0.85, 15, 30, 3,
+      alpha_stop=10)
+    for algorithm in ("corr_join", "brute_force_euc_dist"):
+      assert int(rows[("walks", str(m), algorithm)][10]) == num_corr_pairs
+  assert ("walks", "40", "corr_join+svd_backend=gram") in rows
+  assert int(rows[("walks", "40", "corr_join_sweep")][10]) == num_corr_pairs
+  assert ("walks", "40", "corr_join_sweep+all_thresholds") in rows
+
+
+def test_load_sizes():
+  """
+  Test if the runs with m > -1 load the largest m of their dataset, also
+  above the 1000 time series that m = -1 yields for synthetic_correlated.
+  """
+  spec = [{"datasets": ["synthetic_correlated"], "m": [2000, 50],
+    "params": ["m_params"], "algorithms": ["corr_join"]},
+    {"datasets": ["gas"], "m": [20, 50], "params": ["m_params"],
+    "algorithms": ["corr_join"]},
+    {"datasets": ["synthetic_correlated", "chlorine"], "m": [-1],
+    "params": ["m_params"], "algorithms": ["corr_join"]}]
+  sizes = scheduler.load_sizes(scheduler.expand_experiments(spec))
+  assert sizes == {"synthetic_correlated": 2000, "gas": 50, "chlorine": -1}
+
+
+def test_experiment_spec():
+  """
+  Test if the scheduler runs every run of the gen_* functions of main.py,
+  including the sweep.
+  """
+  runs = scheduler.expand_experiments(scheduler.experiment_spec)
+  algorithms = {run[3] for run in runs}
+  assert algorithms == {"corr_join", "corr_join_sweep", "brute_force_euc_dist",
+    "brute_force_blocked", "corr_join_unoptimized"}
+  assert {run[0] for run in runs if run[3] == "corr_join_sweep"} == {"synthetic",
+    "chlorine", "gas"}
@@ -0,0 +1,134 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from corr_join import corr_join
+from svd import IncrementalSVD, custom_svd
+from test_corr_join_stream import get_correlated_random_walks
+
+
+def align_signs(W_b, reference):
+  """
+  Returns:
+    np.ndarray: W_b with each column flipped to point the same way as the
+    corresponding column of reference.
+  """
+  return W_b * np.sign(np.sum(W_b*reference, axis=0))
+
+
+@pytest.mark.parametrize("backend", ["gram", "randomized"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_svd_backends_match_exact(backend: str, dtype):
+  """
+  Test if the SVD backends compute W_b up to the sign of each column. The
+  randomized backend is an approximation.
+  """
+  rng = np.random.default_rng(0)
+  # Low rank plus noise, like the PAA of correlated windows
+  W_s = (rng.normal(size=(2000, 3)) @ rng.normal(size=(3, 20))
+    + 0.1*rng.normal(size=(2000, 20))).astype(dtype)
+  W_b_exact = custom_svd(W_s, 3)
+  W_b = custom_svd(W_s, 3, backend)
+  assert W_b.shape == (2000, 3)
+  assert W_b.dtype == dtype
+  np.testing.assert_allclose(align_signs(W_b, W_b_exact), W_b_exact,
+    atol=1e-3 if dtype == np.float32 else (1e-5 if backend == "randomized" else 1e-8))
+
+
+@pytest.mark.parametrize("backend", ["exact", "gram", "randomized"])
+def test_svd_backends_contract(backend: str):
+  """
+  Test if W_b = W_s*V_k with orthonormal V_k, so that W_b doesn't increase the
+  distances of W_s, for a flat spectrum, where the randomized range finder
+  misses part of the top-k_b subspace.
+  """
+  rng = np.random.default_rng(0)
+  W_s = rng.normal(size=(500, 20))
+  W_b = custom_svd(W_s, 3, backend)
+  v_k = np.linalg.lstsq(W_s, W_b, rcond=None)[0]
+  np.testing.assert_allclose(W_s @ v_k, W_b, atol=1e-10)
+  np.testing.assert_allclose(v_k.T @ v_k, np.eye(3), atol=1e-10)
+  pairs = rng.integers(0, 500, size=(2000, 2))
+  distances = np.linalg.norm(W_s[pairs[:, 0]] - W_s[pairs[:, 1]], axis=1)
+  distances_b = np.linalg.norm(W_b[pairs[:, 0]] - W_b[pairs[:, 1]], axis=1)
+  assert np.all(distances_b <= distances + 1e-12)
+
+
+def test_exact_svd_no_convergence(monkeypatch):
+  def svd(*args, **kwargs):
+    raise np.linalg.LinAlgError("SVD did not converge")
+  monkeypatch.setattr(np.linalg, "svd", svd)
+  with pytest.raises(np.linalg.LinAlgError):
+    custom_svd(np.eye(3), 2)
+
+
+def test_unknown_svd_backend():
+  with pytest.raises(ValueError):
+    custom_svd(np.eye(3), 2, "lanczos")
+
+
+@pytest.mark.parametrize("backend", ["gram", "randomized"])
+def test_corr_join_svd_backend(backend: str):
+  """
+  Test if corr_join finds the same correlated window pairs with each SVD
+  backend.
+  """
+  df = get_correlated_random_walks()
+  params = (300, 20, 0.85, 15, 30, 3)
+  num_corr_pairs, _, _ = corr_join(df, *params)
+  num_corr_pairs_backend, _, _ = corr_join(df, *params, svd_backend=backend)
+  assert num_corr_pairs_backend == num_corr_pairs
+
+
+def test_incremental_svd_orientation():
+  """
+  Test if IncrementalSVD tracks the exact W_b up to sign over slowly changing
+  windows and keeps the orientation of its basis.
+  """
+  rng = np.random.default_rng(0)
+  factors = rng.normal(size=(3, 20)) * np.array([[5.0], [3.0], [2.0]])
+  loadings = rng.normal(size=(2000, 3))
+  incremental_svd = IncrementalSVD(3)
+  v_prev = None
+  for alpha in range(20):
+    # Rotate the factors a little per window
+    W_s = loadings @ (factors + 0.01*alpha*np.roll(factors, 1, axis=1))
+    W_s += 0.01*rng.normal(size=W_s.shape)
+    W_b = incremental_svd.transform(W_s)
+    W_b_exact = custom_svd(W_s, 3)
+    np.testing.assert_allclose(align_signs(W_b, W_b_exact), W_b_exact, atol=1e-2)
+    if v_prev is not None:
+      assert (np.sum(incremental_svd.v_k*v_prev, axis=0) > 0).all()
+    v_prev = incremental_svd.v_k
+  # The basis is orthonormal
+  np.testing.assert_allclose(v_prev.T @ v_prev, np.eye(3), atol=1e-10)
+  assert incremental_svd.num_updates > 0
+
+
+def test_incremental_svd_fallback():
+  """
+  Test if IncrementalSVD falls back to a full SVD when the windows change
+  completely.
+  """
+  rng = np.random.default_rng(0)
+  incremental_svd = IncrementalSVD(2, iterations=1, tolerance=1e-12)
+  for _ in range(3):
+    W_s = rng.normal(size=(500, 10))
+    W_b = incremental_svd.transform(W_s)
+    np.testing.assert_allclose(align_signs(W_b, custom_svd(W_s, 2)),
+      custom_svd(W_s, 2), atol=1e-8)
+  assert incremental_svd.num_full == 3
+
+
+def test_corr_join_incremental_svd():
+  """
+  Test if corr_join finds the same correlated window pairs with the
+  incremental SVD.
+  """
+  df = get_correlated_random_walks()
+  params = (300, 20, 0.85, 15, 30, 3)
+  num_corr_pairs, _, _ = corr_join(df, *params)
+  num_corr_pairs_incremental, _, _ = corr_join(df, *params, incremental=True,
+    svd_backend="incremental")
+  assert num_corr_pairs_incremental == num_corr_pairs
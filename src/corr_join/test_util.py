@@ -0,0 +1,72 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from corr_join import corr_join, corr_join_sweep, corr_join_unoptimized
+from test_corr_join_stream import get_correlated_random_walks
+import util
+
+
+def test_window_range():
+  """
+  Test if the window range is clipped to the available windows.
+  """
+  assert util.window_range(1000, 300, 10) == range(0, 71)
+  assert util.window_range(1000, 300, 10, 5, 100) == range(5, 71)
+  assert util.window_range(1000, 300, 10, 5, 20) == range(5, 20)
+  assert util.window_range(1000, 300, 10, alpha_stop="all") == range(0, 71)
+  assert len(util.window_range(1000, 300, 10, 5, 5)) == 0
+  with pytest.raises(ValueError):
+    util.window_range(1000, 300, 10, 6, 5)
+
+
+def test_mean_pruning_rate():
+  """
+  Test if the mean pruning rate is the mean over the windows and 0 for an
+  empty window range.
+  """
+  assert util.mean_pruning_rate([0.5, 1.0]) == 0.75
+  assert util.mean_pruning_rate([]) == 0
+  assert np.array_equal(util.mean_pruning_rate(np.empty((0, 3))), np.zeros(3))
+
+
+@pytest.mark.filterwarnings("error")
+def test_empty_window_range():
+  """
+  Test if the engines return 0 correlated window pairs, a pruning rate of 0
+  and section times of 0 for an empty window range, without warnings.
+  """
+  df = get_correlated_random_walks(m=20, len_ts=600)
+  params = (300, 20, 0.85, 15, 30, 3)
+  for engine in (corr_join, corr_join_unoptimized):
+    num_corr_pairs, pruning_rate, section_times = engine(df, *params,
+      alpha_start=2, alpha_stop=2)
+    assert num_corr_pairs == 0 and pruning_rate == 0
+    assert np.array_equal(section_times, np.zeros(5))
+  num_corr_pairs, pruning_rates, section_times = corr_join_sweep(df, 300, 20,
+    [0.8, 0.9], 15, 30, 3, alpha_start=2, alpha_stop=2)
+  assert np.array_equal(num_corr_pairs, [0, 0])
+  assert np.array_equal(pruning_rates, [0, 0])
+
+
+def test_mean_section_times():
+  """
+  Test if the section times are the mean differences of consecutive columns.
+  """
+  p_times = np.array([[0, 1, 3, 6, 10, 15], [0, 3, 5, 8, 12, 17]])
+  assert np.array_equal(util.mean_section_times(p_times), [2, 2, 3, 4, 5])
+
+
+def test_sliding_windows():
+  """
+  Test if the window views correspond to slices of the time series and don't
+  copy the data.
+  """
+  t_series = util.as_time_series_matrix(np.arange(60).reshape(3, 20))
+  assert t_series.dtype == np.float64
+  ts_windows = util.sliding_windows(t_series, 8, 3)
+  assert ts_windows.shape == (3, 5, 8)
+  for alpha in range(5):
+    assert np.array_equal(ts_windows[:, alpha], t_series[:, alpha*3:alpha*3+8])
+  assert np.shares_memory(ts_windows, t_series)
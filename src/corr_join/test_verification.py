@@ -0,0 +1,90 @@
+# Standard library imports
+# Third-party imports
+import numpy as np
+import pytest
+# Local imports
+from corr_join import corr_join
+from result_sink import ArraySink
+from test_corr_join_stream import get_correlated_random_walks
+from verification import early_abandon_distances, pair_dot_products
+
+
+@pytest.mark.parametrize("memory_budget", [2**10, 2**14, 2**24])
+@pytest.mark.parametrize("dense_fraction", [0, 0.5, 2])
+def test_pair_dot_products(memory_budget: int, dense_fraction: float):
+  """
+  Test if the tiled and the batched dot products match the row-wise dot
+  products, for budgets below, around and above the size of W.
+  """
+  rng = np.random.default_rng(0)
+  W = rng.normal(size=(300, 50))
+  pairs = np.argwhere(np.triu(rng.random((300, 300)) < 0.2, k=1))
+  dots = pair_dot_products(W, pairs, memory_budget, dense_fraction)
+  np.testing.assert_allclose(dots, np.sum(W[pairs[:, 0]]*W[pairs[:, 1]], axis=1))
+
+
+def test_pair_dot_products_empty():
+  assert pair_dot_products(np.eye(3), np.empty((0, 2), dtype=int)).shape == (0,)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_corr_join_dot_verification(dtype):
+  """
+  Test if corr_join finds the same correlated window pairs with the dot
+  product verification.
+  """
+  df = get_correlated_random_walks()
+  params = (300, 20, 0.85, 15, 30, 3)
+  columns = {}
+  for verification in ("norm", "dot"):
+    sink = ArraySink()
+    corr_join(df, *params, dtype=dtype, verification=verification,
+      memory_budget=2**14, sink=sink)
+    columns[verification] = sink.columns()
+  for name in ("i", "j", "alpha"):
+    assert np.array_equal(columns["dot"][name], columns["norm"][name])
+  np.testing.assert_allclose(columns["dot"]["corr"], columns["norm"]["corr"],
+    atol=1e-6)
+
+
+@pytest.mark.parametrize("block_size", [1, 16, 64, 1000])
+def test_early_abandon_distances(block_size: int):
+  """
+  Test if early abandoning keeps every pair within eps, also pairs at the
+  threshold, drops the pairs beyond the rounding error of eps and computes
+  the distances of the kept pairs like np.linalg.norm.
+  """
+  rng = np.random.default_rng(0)
+  W = rng.normal(size=(200, 300))
+  W /= np.linalg.norm(W, axis=1)[:, np.newaxis]
+  # Some pairs of nearby windows
+  W[100:] = W[:100] + 0.05*rng.normal(size=(100, 300))/np.sqrt(300)
+  W /= np.linalg.norm(W, axis=1)[:, np.newaxis]
+  pairs = np.argwhere(np.triu(np.ones((200, 200), dtype=bool), k=1))
+  reference = np.linalg.norm(W[pairs[:, 0]] - W[pairs[:, 1]], axis=1)
+  margin = 4*300*np.finfo(W.dtype).eps
+  # Thresholds at the distance of existing pairs
+  for eps in (np.sort(reference)[[50, 99, 2000]]):
+    distances = early_abandon_distances(W, pairs, eps, block_size, chunk_pairs=997)
+    kept = np.isfinite(distances)
+    assert np.all(kept[reference <= eps])
+    assert np.all(reference[kept]**2 <= eps**2 + margin)
+    np.testing.assert_allclose(distances[kept], reference[kept], rtol=1e-12)
+
+
+@pytest.mark.parametrize("verification", ["norm", "dot"])
+def test_corr_join_early_abandon(verification: str):
+  """
+  Test if corr_join finds the same correlated window pairs and correlations
+  with early abandoning in the Euclidean distance filter.
+  """
+  df = get_correlated_random_walks()
+  params = (300, 20, 0.85, 15, 30, 3)
+  columns = {}
+  for early_abandon in (False, True):
+    sink = ArraySink()
+    corr_join(df, *params, verification=verification, sink=sink,
+      early_abandon=early_abandon, abandon_block_size=20)
+    columns[early_abandon] = sink.columns()
+  for name in ("i", "j", "alpha", "corr"):
+    assert np.array_equal(columns[True][name], columns[False][name])
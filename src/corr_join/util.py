@@ -1,10 +1,13 @@
 # Standard library imports
 import logging
-from math import sqrt
+from math import floor, sqrt
+from multiprocessing.shared_memory import SharedMemory
 import os
 from typing import List
 # Third-party imports
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
 # Local imports
 
 
@@ -128,11 +131,178 @@ def create_csv_logger(logger_name: str, loggerlevel, file_name: str, writing_mod
 
   # Write header row if file is empty or doesn't exist
   if not os.path.exists(log_file_path) or os.path.getsize(log_file_path) < 2:
-    logger.info(f"dataset,m,n,h,T,k_s,k_e,k_b,algorithm,pruning_rate,num_corr_pairs,runtime [s],window shift time [ns],SVD time [ns],bucketing filter time [ns],Euclidean distance filter time [ns],Pearson correlation computation time [ns]")
+    logger.info(f"dataset,m,n,h,T,k_s,k_e,k_b,algorithm,pruning_rate,num_corr_pairs,runtime [s],window shift time [ns],SVD time [ns],bucketing filter time [ns],Euclidean distance filter time [ns],Pearson correlation computation time [ns],wall time [s]")
 
   return logger
 
 
+def window_range(len_ts: int, n: int, h: int, alpha_start: int = 0,
+  alpha_stop = None):
+  """
+  Determine the windows an engine processes.
+
+  Parameters:
+  len_ts (int): The length of the time series.
+  n (int): Window size.
+  h (int): Stride.
+  alpha_start (int): The number of the first window.
+  alpha_stop (int, None or "all"): The number of the window after the last
+  window. None and "all" process all windows up to the end of the time
+  series.
+
+  Returns:
+  range: The window numbers alpha, clipped to the available windows. The
+  range is empty if alpha_start == alpha_stop, the engines then return 0
+  correlated window pairs, a pruning rate of 0 and section times of 0.
+  """
+  num_windows = floor((len_ts-n)/h) + 1
+  if alpha_stop is None or alpha_stop == "all":
+    alpha_stop = num_windows
+  if alpha_start < 0 or alpha_stop < alpha_start:
+    raise ValueError(f"Choose 0 <= alpha_start <= alpha_stop. You chose alpha_start = {alpha_start} and alpha_stop = {alpha_stop}")
+  return range(alpha_start, min(alpha_stop, num_windows))
+
+
+def mean_section_times(p_times):
+  """
+  Calculate the mean time of each section from the profiling times.
+
+  Parameters:
+  p_times (np.ndarray): One row per processed window with the 6 time stamps
+  that delimit the 5 sections.
+
+  Returns:
+  np.ndarray: The mean differences between consecutive columns in
+  nanoseconds, rounded to integers.
+  """
+  if len(p_times) == 0:
+    return np.zeros(p_times.shape[1] - 1, dtype=int)
+  return np.round(np.mean(np.diff(p_times, axis=1), axis=0)).astype(int)
+
+
+def mean_pruning_rate(pruning_rates):
+  """
+  Calculate the mean overall pruning rate of the processed windows.
+
+  Parameters:
+  pruning_rates (array-like): The pruning rate of each processed window, or
+  one row of pruning rates per processed window.
+
+  Returns:
+  float or np.ndarray: The mean pruning rate, or one per column. An empty
+  window range prunes nothing, so its pruning rate is 0.
+  """
+  pruning_rates = np.asarray(pruning_rates, dtype=float)
+  if len(pruning_rates) == 0:
+    mean = np.zeros(pruning_rates.shape[1:])
+  else:
+    mean = np.mean(pruning_rates, axis=0)
+  return mean if mean.ndim else float(mean)
+
+
+def as_time_series_matrix(t_series, dtype = None):
+  """
+  Convert a collection of time series to a C-contiguous matrix with one time
+  series per row. float32 and float64 matrices are used as they are, any
+  other input is converted to float64. Convert the data once before
+  processing the windows, not per window.
+
+  Parameters:
+  t_series (pandas.DataFrame, np.ndarray or list of np.ndarrays): Time series
+  of equal length.
+  dtype: Convert the matrix to this floating point type instead, e.g.
+  np.float32. The data is only copied if its type differs.
+
+  Returns:
+  np.ndarray: The time series matrix of shape (m, len_ts).
+  """
+  if isinstance(t_series, pd.DataFrame):
+    t_series = t_series.to_numpy()
+  t_series = np.asarray(t_series)
+  if dtype is not None:
+    t_series = t_series.astype(dtype, copy=False)
+  elif t_series.dtype not in (np.float32, np.float64):
+    t_series = t_series.astype(np.float64)
+  return np.ascontiguousarray(t_series)
+
+
+def sliding_windows(t_series, n: int, h: int):
+  """
+  Create strided views of all windows of a time series matrix without copying
+  any data.
+
+  Parameters:
+  t_series (np.ndarray): The time series matrix of shape (m, len_ts).
+  n (int): Window size.
+  h (int): Stride.
+
+  Returns:
+  np.ndarray: A read-only view of shape (m, number of windows, n), window
+  alpha of all time series is [:, alpha].
+  """
+  return sliding_window_view(t_series, n, axis=1)[:, ::h]
+
+
+def share_array(arr):
+  """
+  Copy an array into a new shared memory block, such that worker processes
+  can read it without pickling. The caller must close and unlink the block.
+
+  Returns:
+  tuple: The SharedMemory block and the np.ndarray view of it.
+  """
+  shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+  shared = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+  shared[...] = arr
+  return shm, shared
+
+
+def attach_shared_array(name: str, shape, dtype):
+  """
+  Attach to a shared memory block created by share_array. The caller must
+  close the block after dropping all references to the array.
+
+  Returns:
+  tuple: The SharedMemory block and the read-only np.ndarray view of it.
+  """
+  shm = SharedMemory(name=name)
+  shared = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+  shared.flags.writeable = False
+  return shm, shared
+
+
+def normalize_pair_rows(w, pairs, dtype = np.float64):
+  """
+  Normalize only the windows that appear in one of the given pairs.
+
+  Parameters:
+  w (np.ndarray): The raw windows, a matrix of shape (m, n).
+  pairs (np.ndarray): One pair of row indices per row, shape (p, 2).
+  dtype: The floating point type of the computation.
+
+  Returns:
+  tuple: The normalized windows of the pairs and the pairs as indices into
+  them.
+  """
+  rows, index = np.unique(pairs, return_inverse=True)
+  W = w[rows].astype(dtype)
+  W -= np.mean(W, axis=1)[:, np.newaxis]
+  W /= np.sqrt(np.sum(np.square(W), axis=1))[:, np.newaxis]
+  return W, index.reshape(pairs.shape)
+
+
+def pair_distances(w, pairs, dtype = np.float64):
+  """
+  Compute the Euclidean distances between the normalized windows of the given
+  pairs, see normalize_pair_rows.
+
+  Returns:
+  np.ndarray: The distance of each pair, shape (p,).
+  """
+  W, index = normalize_pair_rows(w, pairs, dtype)
+  return np.linalg.norm(W[index[:, 0]] - W[index[:, 1]], axis=1)
+
+
 # Functions for testing and debugging
 
 def corr_euc_d(norm_x, norm_y):
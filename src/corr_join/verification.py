@@ -0,0 +1,168 @@
+# Standard library imports
+from math import isqrt
+# Third-party imports
+import numpy as np
+# Local imports
+
+
+def pair_dot_products(W, pairs, memory_budget: int = 2**27,
+  dense_fraction: float = 1/16, block_size: int = 512):
+  """
+  Compute the dot products of the rows of W for the given pairs with bounded
+  memory. For rows with unit norm, the distance is at most eps exactly if the
+  dot product is at least T = 1 - eps^2/2, so the verification doesn't need
+  the difference of the rows.
+  The pairs are grouped into square tiles of the matrix W*W^T. If a tile
+  contains at least dense_fraction of its entries as pairs, the whole tile is
+  computed with one matrix multiplication and the pairs are picked from it.
+  The dot products of the remaining pairs are computed in batches of
+  gathered rows.
+
+  Parameters:
+  W (np.ndarray): The normalized windows, shape (m, n).
+  pairs (np.ndarray): One pair of row indices per row, shape (p, 2).
+  memory_budget (int): The maximum size in bytes of a tile and of the
+  gathered rows of a batch.
+  dense_fraction (float): The fraction of pairs from which on a tile is
+  computed with a matrix multiplication.
+  block_size (int): The number of rows of a tile. Smaller tiles find the
+  dense clusters of candidates, larger tiles make fewer calls.
+
+  Returns:
+  np.ndarray: The dot product of each pair, shape (p,).
+  """
+  m, n = W.shape
+  dots = np.empty(len(pairs), dtype=W.dtype)
+  if len(pairs) == 0:
+    return dots
+  # A tile of block x block dot products fits into the memory budget
+  block = max(1, min(block_size, isqrt(memory_budget // W.itemsize)))
+  num_blocks = -(-m // block)
+  tile_keys = (pairs[:, 0] // block).astype(np.int64)*num_blocks + pairs[:, 1] // block
+  order = np.argsort(tile_keys, kind='stable')
+  keys, starts, counts = np.unique(tile_keys[order], return_index=True,
+    return_counts=True)
+  dense = counts >= dense_fraction*block*block
+  for key, start, count in zip(keys[dense], starts[dense], counts[dense]):
+    lo_i, lo_j = (key // num_blocks)*block, (key % num_blocks)*block
+    tile = W[lo_i:lo_i + block] @ W[lo_j:lo_j + block].T
+    idx = order[start:start + count]
+    dots[idx] = tile[pairs[idx, 0] - lo_i, pairs[idx, 1] - lo_j]
+
+  # Remaining pairs in batches, W[i] and W[j] of a batch fit into the budget
+  sparse = order[np.repeat(~dense, counts)]
+  batch = max(1, memory_budget // (2*n*W.itemsize))
+  for lo in range(0, len(sparse), batch):
+    idx = sparse[lo:lo + batch]
+    dots[idx] = np.einsum('ij,ij->i', W[pairs[idx, 0]], W[pairs[idx, 1]])
+  return dots
+
+
+def early_abandon_distances(W, pairs, eps, block_size: int = 64,
+  chunk_pairs: int = 2**16):
+  """
+  Compute the distances of the pairs that are within eps, abandoning each
+  pair as soon as the squared differences of its first columns exceed eps^2.
+  The squared differences are accumulated over blocks of block_size columns,
+  after each block the pairs that can't be within eps anymore are dropped
+  from the active set. Each pair is read once, the distance of a surviving
+  pair is the square root of its accumulated sum.
+  A pair is only abandoned if its partial sum exceeds eps^2 by more than the
+  rounding error, which is bounded by 4*n*machine epsilon for rows with norm
+  at most 1, like W and its PAA. Thus the surviving pairs (finite distance)
+  include every pair within eps, and a filter that keeps them never drops a
+  pair that the full computation keeps. A survivor may exceed eps by the
+  rounding error.
+
+  Parameters:
+  W (np.ndarray): The windows, shape (m, n).
+  pairs (np.ndarray): One pair of row indices per row, shape (p, 2).
+  eps (float): distance threshold ε
+  block_size (int): The number of columns per block.
+  chunk_pairs (int): The number of pairs processed at once, this caps the
+  memory of the gathered blocks.
+
+  Returns:
+  np.ndarray: The distance of each pair, np.inf for abandoned pairs, shape (p,).
+  """
+  n = W.shape[1]
+  distances = np.full(len(pairs), np.inf, dtype=W.dtype)
+  threshold = eps**2 + 4*n*np.finfo(W.dtype).eps
+  for lo in range(0, len(pairs), chunk_pairs):
+    active = np.arange(lo, min(lo + chunk_pairs, len(pairs)))
+    partial = np.zeros(len(active), dtype=W.dtype)
+    for col in range(0, n, block_size):
+      diff = (W[pairs[active, 0], col:col + block_size]
+        - W[pairs[active, 1], col:col + block_size])
+      partial += np.einsum('ij,ij->i', diff, diff)
+      # Compact the active set
+      keep = partial <= threshold
+      active, partial = active[keep], partial[keep]
+      if len(active) == 0:
+        break
+    distances[active] = np.sqrt(partial)
+  return distances
+
+
+def euclidean_filter(W_e, pairs, eps, early_abandon: bool = False,
+  block_size: int = 64):
+  """
+  The Euclidean distance filter of CorrJoin: keep the candidate pairs whose
+  windows in W_e are within eps.
+
+  Parameters:
+  W_e (np.ndarray): The PAA of the windows, shape (m, k_e).
+  pairs (np.ndarray): The candidate pairs C_1, shape (p, 2).
+  eps (float or np.ndarray): The distance threshold ε, or one threshold per
+  T of a sweep.
+  early_abandon (bool): Abandon the pairs beyond the largest eps, see
+  early_abandon_distances. All survivors of the largest eps are kept, such
+  that no pair is lost to rounding, the smaller thresholds get the same
+  rounding margin.
+  block_size (int): See early_abandon_distances.
+
+  Returns:
+  np.ndarray: The mask of the pairs within eps, shape (p,), or (p, len(eps))
+  for an array of thresholds.
+  """
+  eps = np.asarray(eps, dtype=float)
+  thresholds = np.atleast_1d(eps)
+  if early_abandon:
+    distances = early_abandon_distances(W_e, pairs, np.max(thresholds), block_size)
+    margin = 4*W_e.shape[1]*np.finfo(W_e.dtype).eps
+    mask = np.less_equal.outer(np.square(distances), np.square(thresholds) + margin)
+    mask[:, thresholds == np.max(thresholds)] = np.isfinite(distances)[:, np.newaxis]
+  else:
+    distances = np.linalg.norm(W_e[pairs[:, 0]] - W_e[pairs[:, 1]], axis=1)
+    mask = np.less_equal.outer(distances, thresholds)
+  return mask.reshape(len(pairs), *eps.shape)
+
+
+def verify_pairs(W, pairs, T, verification: str = "norm",
+  memory_budget: int = 2**27):
+  """
+  The verification of CorrJoin: compute the Pearson correlation of the pairs
+  from their normalized windows and compare it to T.
+
+  Parameters:
+  W (np.ndarray): The normalized windows, shape (m, n).
+  pairs (np.ndarray): The candidate pairs C_2 as indices into W, shape (p, 2).
+  T (float or np.ndarray): The correlation threshold, or one threshold per
+  run of a sweep.
+  verification (str): "norm" compares the distances of the windows to
+  sqrt(2*(1-T)), "dot" compares the dot products to T, see corr_join.
+  memory_budget (int): See pair_dot_products.
+
+  Returns:
+  tuple: The mask of the correlated pairs, shape (p,), or (p, len(T)) for an
+  array of thresholds, and the Pearson correlation of each pair, shape (p,).
+  """
+  T = np.asarray(T, dtype=float)
+  if verification == "dot":
+    corrcoefs = pair_dot_products(W, pairs, memory_budget)
+    return np.greater_equal.outer(corrcoefs, T), corrcoefs
+  if verification != "norm":
+    raise ValueError(f"Choose verification 'norm' or 'dot'. You chose {verification}")
+  distances = np.linalg.norm(W[pairs[:, 0]] - W[pairs[:, 1]], axis=1)
+  # x*y = 1 - |x - y|^2/2 for unit-norm x and y
+  return np.less_equal.outer(distances, np.sqrt(2*(1-T))), 1 - np.square(distances)/2